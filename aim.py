@@ -0,0 +1,150 @@
+# aim.py
+
+import numpy as np
+from constants import BALL_RADIUS, WIDTH, HEIGHT, FRICTION, AIM_MAX_BOUNCES, AIM_TOLERANCE
+from physics import cue_impulse
+from event_driven import travel, stop_time, first_contact
+
+class AimPrediction:
+    """
+    Predicted outcome of a shot.
+
+    cue_path:    (K, 2) points the cue ball passes through: start, cushion bounces, contact, and where it stops
+    contact:     cue ball centre at the moment it touches the object ball, or None if it hits nothing
+    target:      index of the first object ball hit, or None
+    target_path: (M, 2) points of the object ball's path after the hit (empty without a target)
+    pocketed:    indices of the balls the prediction sends into a pocket
+    """
+    def __init__(self, cue_path, contact=None, target=None, target_path=None, pocketed=()):
+        self.cue_path = np.asarray(cue_path, dtype=float)
+        self.contact = contact
+        self.target = target
+        self.target_path = np.zeros((0, 2)) if target_path is None else np.asarray(target_path, dtype=float)
+        self.pocketed = tuple(pocketed)
+
+class AimPredictor:
+    """
+    Ghost-trajectory preview of the shot being aimed, cheap enough to run every frame.
+
+    Instead of stepping the table, each ball is followed leg by leg in closed form, using the same travel
+    math as the event-driven solver: a leg runs until the ball stops or reaches a cushion, a pocket or another
+    (resting) ball. The cue ball is followed through up to AIM_MAX_BOUNCES cushions to its first contact;
+    the contact is resolved with the table's restitution, and both balls are followed for one more leg
+    (plus cushion bounces) after it.
+
+    The last prediction is cached and only recomputed when the drag vector moves by more than AIM_TOLERANCE
+    pixels, the hit spot changes or a ball on the table moves.
+
+    table: BallSet being aimed on
+    """
+    def __init__(self, table, max_bounces: int = AIM_MAX_BOUNCES, tolerance: float = AIM_TOLERANCE):
+        self.table = table
+        self.max_bounces = max_bounces
+        self.tolerance = tolerance
+        self.version = 0  # bumped on every recompute, e.g. to tell the renderer the overlay changed
+        self._key = None
+        self._direction = None
+        self._result = None
+
+    def predict(self, direction, hit_spot: str = "CENTER", cue: int = 0) -> AimPrediction:
+        """
+        direction: vector from the mouse to the cue ball, as passed to Simulation.shoot
+        hit_spot:  key of HIT_SPOT_EFFECTS; its angle offset is applied as in the real shot
+        """
+        direction = np.asarray(direction, dtype=float)
+        table = self.table
+        key = (hit_spot, cue, table.pos.tobytes(), table.pocketed.tobytes())
+        if (self._result is not None and key == self._key
+                and np.linalg.norm(direction - self._direction) <= self.tolerance):
+            return self._result
+
+        self._key, self._direction = key, direction.copy()
+        self._result = self._predict(direction, hit_spot, cue)
+        self.version += 1
+        return self._result
+
+    def _predict(self, direction, hit_spot, cue) -> AimPrediction:
+        table = self.table
+        vel = cue_impulse(direction, hit_spot) / table.mass[cue]
+        others = np.flatnonzero(~table.pocketed & (np.arange(len(table)) != cue))
+
+        # Cue ball up to its first contact
+        cue_path, vel, target, in_pocket = self._trace(cue, table.pos[cue], vel, others, self.max_bounces)
+        pocketed = [cue] if in_pocket else []
+        if target is None:
+            return AimPrediction(cue_path, pocketed=pocketed)
+        contact = cue_path[-1]
+
+        # Resolve the contact like resolve_inelastic_collisions: J = -(1 + e) u / (1/m1 + 1/m2) along n
+        normal = contact - table.pos[target]
+        normal /= np.linalg.norm(normal)
+        u = vel @ normal
+        m1, m2 = table.mass[cue], table.mass[target]
+        e = table.materials.restitution[table.material[cue], table.material[target]]
+        impulse = -(1 + e) * u / (1 / m1 + 1 / m2)
+        cue_vel = vel + impulse * normal / m1
+        target_vel = -impulse * normal / m2
+
+        # Both balls after the contact, against the other resting balls; they leave the contact
+        # separating, so they aren't checked against each other
+        rest = others[others != target]
+        after, _, _, in_pocket = self._trace(cue, contact, cue_vel, rest, self.max_bounces)
+        if in_pocket:
+            pocketed.append(cue)
+        target_path, _, _, in_pocket = self._trace(target, table.pos[target], target_vel, rest, self.max_bounces)
+        if in_pocket:
+            pocketed.append(target)
+        return AimPrediction(np.vstack([cue_path, after[1:]]), contact, int(target), target_path, pocketed)
+
+    def _trace(self, ball, pos, vel, others, bounces):
+        """
+        Follows one ball from pos with velocity vel past up to `bounces` cushions.
+
+        others: indices of the resting balls it can run into
+        Returns (points, velocity at the last point, index of the ball hit or None, whether it ended in a pocket).
+        """
+        table, layout = self.table, self.table.layout
+        obstacles = table.pos[others]
+        cushion = table.cushion[ball]
+        points = [pos.copy()]
+        pos, vel = pos.astype(float), vel.astype(float)
+        for _ in range(bounces + 1):
+            speed = np.hypot(*vel)
+            if speed == 0:
+                break
+            # Distance factor g (displacement = vel * g) to where the ball stops
+            g_stop = float(travel(stop_time(speed)))
+
+            # Cushions: p + v g = R or p + v g = limit - R per axis
+            g_wall, axis = np.inf, None
+            for a, limit in ((0, WIDTH), (1, HEIGHT)):
+                if vel[a] > 0:
+                    g = (limit - BALL_RADIUS - pos[a]) / vel[a]
+                elif vel[a] < 0:
+                    g = (BALL_RADIUS - pos[a]) / vel[a]
+                else:
+                    continue
+                if g < g_wall:
+                    g_wall, axis = max(g, 0.0), a
+
+            # Balls and pockets: centre distance reaches 2R, or the centre enters the pocket circle
+            g_hit, k_ball = np.inf, None
+            if len(others):
+                g_ball = first_contact(pos - obstacles, np.broadcast_to(vel, obstacles.shape), 2 * BALL_RADIUS)
+                k_ball = int(np.argmin(g_ball))
+                g_hit = g_ball[k_ball]
+            g_pocket = float(first_contact(pos - layout.centres, np.broadcast_to(vel, layout.centres.shape), layout.radii).min())
+
+            g = min(g_stop, g_wall, g_hit, g_pocket)
+            points.append(pos + vel * g)
+            if g == g_stop:
+                return np.array(points), np.zeros(2), None, False
+            if g == g_pocket:
+                return np.array(points), np.zeros(2), None, True
+            # Speed falls linearly with distance travelled: v f^t = v (1 - g (1 - FRICTION))
+            vel = vel * (1 - g * (1 - FRICTION))
+            if g == g_hit:
+                return np.array(points), vel, int(others[k_ball]), False
+            pos = points[-1]
+            vel[axis] *= -cushion
+        return np.array(points), vel, None, False
@@ -0,0 +1,79 @@
+import time
+import numpy as np
+import pygame
+from constants import AUDIO_CHANNELS, AUDIO_MAX_PER_FRAME, AUDIO_RETRIGGER_INTERVAL, AUDIO_MIN_VOLUME
+
+class CollisionMixer:
+    """
+    Collision audio with a fixed pool of mixer channels.
+
+    Physics reports impacts with trigger() or submit() during a frame; nothing is played until flush(),
+    called once per frame. flush() keeps only the loudest AUDIO_MAX_PER_FRAME impacts, skips any ball or
+    pair that sounded less than AUDIO_RETRIGGER_INTERVAL seconds ago, and plays the rest on the channel pool,
+    each channel with its own volume. A resting ball against a cushion or a cluster of contacts therefore
+    costs a handful of plays instead of dozens.
+
+    sound: the pygame Sound to play
+    """
+    def __init__(self, sound: pygame.mixer.Sound, channels: int = AUDIO_CHANNELS, max_per_frame: int = AUDIO_MAX_PER_FRAME,
+                 retrigger_interval: float = AUDIO_RETRIGGER_INTERVAL, min_volume: float = AUDIO_MIN_VOLUME):
+        self.sound = sound
+        self.max_per_frame = max_per_frame
+        self.retrigger_interval = retrigger_interval
+        self.min_volume = min_volume
+
+        # Reserve the pool so other sounds never steal these channels
+        if pygame.mixer.get_num_channels() < channels:
+            pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        self._started = [0.0] * channels
+
+        self._last_played = {}  # key -> time it last sounded
+        self._volumes = []
+        self._keys = []
+
+    def trigger(self, volume: float, key=None) -> None:
+        """Reports one impact this frame."""
+        self._volumes.append(np.atleast_1d(float(volume)))
+        self._keys.append(np.atleast_1d(np.int64(-1 if key is None else key)))
+
+    def submit(self, volumes: np.ndarray, keys: np.ndarray) -> None:
+        """Reports a batch of impacts this frame."""
+        if len(volumes):
+            self._volumes.append(np.asarray(volumes, dtype=float))
+            self._keys.append(np.asarray(keys, dtype=np.int64))
+
+    def flush(self, now: float = None) -> int:
+        """Plays this frame's loudest impacts. Returns how many were played."""
+        if not self._volumes:
+            return 0
+        now = time.perf_counter() if now is None else now
+        volumes = np.concatenate(self._volumes)
+        keys = np.concatenate(self._keys)
+        self._volumes, self._keys = [], []
+
+        played = 0
+        for k in np.argsort(-volumes, kind="stable"):
+            volume = volumes[k]
+            if volume < self.min_volume or played == self.max_per_frame:
+                break
+            key = int(keys[k])
+            if now - self._last_played.get(key, -np.inf) < self.retrigger_interval:
+                continue
+            self._last_played[key] = now
+            self._play(volume, now)
+            played += 1
+
+        # Forget keys that can sound again, so the table doesn't grow over a long session
+        if len(self._last_played) > 1024:
+            self._last_played = {k: t for k, t in self._last_played.items() if now - t < self.retrigger_interval}
+        return played
+
+    def _play(self, volume: float, now: float) -> None:
+        # A free channel if there is one, otherwise the one that started longest ago
+        free = [i for i, channel in enumerate(self.channels) if not channel.get_busy()]
+        i = free[0] if free else int(np.argmin(self._started))
+        self.channels[i].set_volume(volume)
+        self.channels[i].play(self.sound)
+        self._started[i] = now
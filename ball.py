@@ -1,60 +1,248 @@
-import pygame
 import numpy as np
-from constants import BALL_RADIUS, WIDTH, HEIGHT, MASS, FRICTION, WALL_RESTITUTION
+from constants import BALL_RADIUS, WIDTH, HEIGHT, MASS, FRICTION, REST_SPEED, MAX_STEP_TRAVEL, MAX_ADAPTIVE_SUBSTEPS
+from materials import MATERIALS
+from physics import play_sound, sound_key, collide_walls, resolve_inelastic_collisions, in_pocket
+from broadphase import SpatialHash
+from tables import DEFAULT_LAYOUT
+from contacts import ContactBuffer, WALL
+from profiler import NULL_PROFILER
 import math
 
 class Ball:
-    def __init__(self, x, y, color, material):
-        self.pos = np.array([x, y], dtype=float)
-        self.vel = np.array([0, 0], dtype=float)
-        self.speed = 0
+    """
+    A single ball. Its state lives in row `index` of a BallSet; the attributes below are
+    views into those arrays, so the table can be stepped as a whole while Balls are used for drawing.
+    """
+    def __init__(self, x, y, color, material, ball_set=None, index=0):
+        if ball_set is None:
+            # Standalone ball: back it with its own one-row set
+            ball_set = BallSet([(x, y, color, material)])
+        self.ball_set = ball_set
+        self.index = index
         self.color = color
-        self.mass = MASS # Ensure mass is a float
-        self.material = material
-        self.pocketed = False
 
-    def move(self, col_sound):
+    @property
+    def pos(self):
+        return self.ball_set.pos[self.index]
+
+    @pos.setter
+    def pos(self, value):
+        self.ball_set.pos[self.index] = value
+
+    @property
+    def vel(self):
+        return self.ball_set.vel[self.index]
+
+    @vel.setter
+    def vel(self, value):
+        self.ball_set.vel[self.index] = value
+
+    @property
+    def speed(self):
+        vx, vy = self.ball_set.vel[self.index]
+        return math.hypot(vx, vy)
+
+    @property
+    def mass(self):
+        return self.ball_set.mass[self.index]
+
+    @property
+    def material(self):
+        return self.ball_set.material_names[self.index]
+
+    @property
+    def material_id(self):
+        return self.ball_set.material[self.index]
+
+    @property
+    def pocketed(self):
+        return bool(self.ball_set.pocketed[self.index])
+
+    @pocketed.setter
+    def pocketed(self, value):
+        self.ball_set.pocketed[self.index] = value
+
+    def move(self, col_sound=None):
+        """
+        Moves this ball alone by one frame and appends its wall hits to the set's contacts; col_sound, if given,
+        is also played for them. The buffer is shared by the whole set, so a caller moving the balls one by one
+        clears it once at the start of each frame (table.contacts.clear()), not per ball.
+        """
+        table = self.ball_set
         if not self.pocketed:
             # Move the ball based on its velocity
             self.pos += self.vel
             self.vel *= FRICTION  # Friction
-            self.speed = math.hypot(self.vel[0],self.vel[1])
-
-            # volume adjustment
-            volume = min(1.0, self.speed / 20)
-            
-
-            # Wall collisions (left, right, top, bottom)
-            if self.pos[1] - BALL_RADIUS <= 0:  # Top wall
-                self.pos[1] = BALL_RADIUS
-                self.vel[1] *= -WALL_RESTITUTION
-                col_sound.set_volume(volume)
-                col_sound.play()
-
-            elif self.pos[1] + BALL_RADIUS >= HEIGHT:  # Bottom wall
-                self.pos[1] = HEIGHT - BALL_RADIUS
-                self.vel[1] *= -WALL_RESTITUTION
-                col_sound.set_volume(volume)
-                col_sound.play()
-
-            if self.pos[0] - BALL_RADIUS <= 0:  # Left wall
-                self.pos[0] = BALL_RADIUS
-                self.vel[0] *= -WALL_RESTITUTION
-                col_sound.set_volume(volume)
-                col_sound.play()
-                
-            elif self.pos[0] + BALL_RADIUS >= WIDTH:  # Right wall
-                self.pos[0] = WIDTH - BALL_RADIUS
-                self.vel[0] *= -WALL_RESTITUTION
-                col_sound.set_volume(volume)
-                col_sound.play()
+            if self.speed < REST_SPEED:
+                self.vel *= 0  # Asleep until something hits it
+
+            # Wall collisions (left, right, top, bottom): clamp inside the table and reflect, as collide_walls
+            cushion = table.materials.cushion[table.material[self.index]]
+            for axis, limit in ((0, WIDTH), (1, HEIGHT)):
+                p = self.pos[axis]
+                if p - BALL_RADIUS > 0 and p + BALL_RADIUS < limit:
+                    continue
+                side = -1 if p - BALL_RADIUS <= 0 else 1
+                self.pos[axis] = BALL_RADIUS if side < 0 else limit - BALL_RADIUS
+                normal_speed = abs(self.vel[axis])
+                self.vel[axis] *= -cushion
+                point = self.pos.copy()
+                point[axis] += side * BALL_RADIUS
+                table.contacts.append(table.steps, self.index, WALL, self.mass * (1 + cushion) * normal_speed, normal_speed, point)
+                play_sound(col_sound, min(1.0, normal_speed / 20), sound_key(self.index))
         else:
             self.vel *= 0
-            self.speed = 0
 
     def is_moving(self):
-        return np.linalg.norm(self.vel) > 0.01
+        return np.linalg.norm(self.vel) > REST_SPEED
 
-    def draw(self, screen):
-        if not self.pocketed:
-            pygame.draw.circle(screen, self.color, self.pos.astype(int), BALL_RADIUS)
\ No newline at end of file
+class BallSet:
+    """
+    Structure-of-arrays storage for a whole table of balls.
+
+    setup:     list of (x, y, color, material) tuples, same format as INITIAL_SETUP
+    layout:    TableLayout with the pockets of the table (DEFAULT_LAYOUT if None)
+    materials: MaterialRegistry the material names are looked up in (MATERIALS if None)
+
+    pos, vel:  (N, 2) float arrays
+    mass:      (N,) float array
+    material:  (N,) int array of ids into the material registry
+    cushion:   (N,) float array of cushion restitution, looked up from the registry on each access
+    pocketed:  (N,) bool array
+    """
+    def __init__(self, setup, broad_phase=None, layout=None, materials=None):
+        n = len(setup)
+        self._init_state(
+            pos=np.array([(x, y) for x, y, _, _ in setup], dtype=float).reshape(n, 2),
+            vel=np.zeros((n, 2), dtype=float),
+            mass=np.full(n, MASS, dtype=float),
+            material_names=[material for _, _, _, material in setup],
+            pocketed=np.zeros(n, dtype=bool),
+            broad_phase=broad_phase, layout=layout, materials=materials,
+        )
+        self.balls = [Ball(x, y, color, material, ball_set=self, index=i) for i, (x, y, color, material) in enumerate(setup)]
+
+    def _init_state(self, pos, vel, mass, material_names, pocketed, broad_phase=None, layout=None, materials=None,
+                    profiler=NULL_PROFILER):
+        """
+        Sets up every attribute of the set from its per-ball arrays; shared by all constructors, including
+        TableBatch's, so a new attribute only has to be added here. Leaves `balls` empty for the caller to fill.
+        """
+        self.pos, self.vel, self.mass, self.pocketed = pos, vel, mass, pocketed
+        self.material_names = list(material_names)
+        self.materials = materials if materials is not None else MATERIALS
+        self.material = self.materials.lookup(self.material_names)
+
+        # Contacts of the latest step, and the number of steps taken
+        self.contacts = ContactBuffer()
+        self.steps = 0
+
+        # Produces candidate pairs for the collision step
+        self.broad_phase = broad_phase if broad_phase is not None else SpatialHash()
+        self.layout = layout if layout is not None else DEFAULT_LAYOUT
+
+        # Times the phases of each substep; set to a FrameProfiler to see them
+        self.profiler = profiler
+
+        self.balls = []
+
+    def __len__(self):
+        return len(self.pos)
+
+    @property
+    def cushion(self):
+        """(N,) cushion restitution, looked up from the registry so re-registered materials take effect."""
+        return self.materials.cushion[self.material]
+
+    def speeds(self):
+        return np.hypot(self.vel[:, 0], self.vel[:, 1])
+
+    def awake(self):
+        """
+        (N,) bool mask of balls that still need stepping: on the table and not asleep.
+        A sleeping ball has exactly zero velocity; any impulse (a hit or a shot) wakes it.
+        """
+        return ~self.pocketed & np.any(self.vel != 0, axis=1)
+
+    def is_moving(self):
+        """True if any ball still on the table is moving."""
+        live = ~self.pocketed
+        return bool(np.any(self.speeds()[live] > REST_SPEED))
+
+    @property
+    def settled(self):
+        """True once every ball on the table has come to rest; stepping a settled table does nothing."""
+        return not self.is_moving()
+
+    def substeps_for(self, dt):
+        """
+        Number of substeps needed so that no ball travels more than MAX_STEP_TRAVEL * BALL_RADIUS
+        per substep. Slow tables get a single step.
+        """
+        speeds = self.speeds()[~self.pocketed]
+        max_travel = speeds.max(initial=0.0) * dt
+        n = int(np.ceil(max_travel / (MAX_STEP_TRAVEL * BALL_RADIUS)))
+        return min(max(n, 1), MAX_ADAPTIVE_SUBSTEPS)
+
+    def step(self, dt=1.0):
+        """
+        Advances every ball by dt frames (1.0 = one 1/FPS frame): friction, wall bounces,
+        ball-ball collisions and pocket checks.
+        Fast tables are split into substeps so balls can't pass through each other or skip pockets.
+        Every wall hit and ball contact of the step is written to self.contacts.
+        """
+        self.contacts.clear()
+        if not self.awake().any():
+            self.steps += 1
+            return
+        n = self.substeps_for(dt)
+        for _ in range(n):
+            self._substep(dt / n)
+        self.steps += 1
+
+    def _candidate_pairs(self, live, awake):
+        return self.broad_phase.candidate_pairs(self.pos, live, awake)
+
+    def _substep(self, dt, due=None):
+        """
+        One integration step of dt frames. Sleeping balls are only touched if an awake ball hits them.
+
+        dt:  frames, or a (N,) array of frames per ball
+        due: optional (N,) bool mask of the balls that take this substep
+        """
+        live = ~self.pocketed
+        awake = self.awake()
+        if due is not None:
+            awake &= due
+        if not awake.any():
+            return
+
+        profiler = self.profiler
+        # Move and apply friction; FRICTION is per frame, so a partial frame gets FRICTION^dt
+        with profiler.phase("move"):
+            step_dt = dt[awake, None] if np.ndim(dt) else dt
+            self.pos[awake] += self.vel[awake] * step_dt
+            self.vel[awake] *= FRICTION ** step_dt
+            self.vel[self.pocketed] = 0
+
+        # Walls: impulse m(1 + e)u reverses the normal velocity
+        with profiler.phase("walls"):
+            cushion = self.cushion
+            ball, _, normal_speed, point = collide_walls(self.pos, self.vel, awake, cushion)
+            impulse = self.mass[ball] * (1 + cushion[ball]) * normal_speed
+            self.contacts.append(self.steps, ball, WALL, impulse, normal_speed, point)
+
+        # Ball-ball collisions; pairs of two sleeping balls are skipped, a hit wakes the sleeper
+        with profiler.phase("collisions"):
+            pair_i, pair_j = self._candidate_pairs(live, awake)
+            hit_i, hit_j, *contact = resolve_inelastic_collisions(self.pos, self.vel, self.mass, self.material, self.materials.restitution, live, pair_i, pair_j)
+            self.contacts.append(self.steps, hit_i, hit_j, *contact)
+            awake[hit_i] = awake[hit_j] = True
+
+        # Pockets
+        with profiler.phase("pockets"):
+            self.pocketed |= in_pocket(self.pos, awake, self.layout)
+
+        # Sleep: balls that slowed below REST_SPEED stop exactly instead of creeping forever
+        slow = awake & (self.speeds() < REST_SPEED)
+        self.vel[slow | self.pocketed] = 0
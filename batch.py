@@ -0,0 +1,144 @@
+import numpy as np
+from constants import FPS, WIDTH, HEIGHT, BALL_RADIUS, REST_SPEED, MAX_STEP_TRAVEL, MAX_ADAPTIVE_SUBSTEPS
+from ball import BallSet
+from broadphase import SpatialHash
+from physics import cue_impulses
+
+# Empty space between neighbouring tables on the broad phase grid, so no pair spans two tables
+TABLE_GAP = 4 * BALL_RADIUS
+
+class TableBatch(BallSet):
+    """
+    B copies of a table stepped together. The B * N balls are stored as one flat BallSet, so the usual
+    vectorized kernels step every table at once; pos, vel and pocketed are also exposed as (B, N, ...) views.
+    For the broad phase each table is shifted TABLE_GAP past the right edge of the previous one,
+    so balls only ever collide with balls of their own table.
+    Each table takes the substeps it would take on its own, so every copy evolves exactly like a
+    single BallSet with the same state.
+
+    table:      BallSet whose current state every copy starts from
+    batch_size: number of tables B
+    """
+    def __init__(self, table: BallSet, batch_size: int):
+        b, n = batch_size, len(table)
+        self.batch_size, self.num_balls = b, n
+        self._init_state(
+            pos=np.tile(table.pos, (b, 1)),
+            vel=np.tile(table.vel, (b, 1)),
+            mass=np.tile(table.mass, b),
+            material_names=list(table.material_names) * b,
+            pocketed=np.tile(table.pocketed, b),
+            broad_phase=SpatialHash(width=b * (WIDTH + TABLE_GAP), height=HEIGHT),
+            layout=table.layout, materials=table.materials, profiler=table.profiler,
+        )
+
+        # State every table starts from, for reset()
+        self._start = table.pos.copy(), table.vel.copy(), table.pocketed.copy()
+
+        # Broad phase x offset of every ball's table
+        self._offset = np.zeros((b * n, 2))
+        self._offset[:, 0] = np.repeat(np.arange(b) * (WIDTH + TABLE_GAP), n)
+
+    @property
+    def batch_pos(self) -> np.ndarray:
+        """(B, N, 2) view of the positions."""
+        return self.pos.reshape(self.batch_size, self.num_balls, 2)
+
+    @property
+    def batch_vel(self) -> np.ndarray:
+        """(B, N, 2) view of the velocities."""
+        return self.vel.reshape(self.batch_size, self.num_balls, 2)
+
+    @property
+    def batch_pocketed(self) -> np.ndarray:
+        """(B, N) view of the pocketed flags."""
+        return self.pocketed.reshape(self.batch_size, self.num_balls)
+
+    def reset(self, tables=None) -> None:
+        """Puts tables (a (B,) bool mask or index array; all if None) back to the starting state."""
+        tables = slice(None) if tables is None else tables
+        pos, vel, pocketed = self._start
+        self.batch_pos[tables] = pos
+        self.batch_vel[tables] = vel
+        self.batch_pocketed[tables] = pocketed
+
+    def table_of(self, ball):
+        """Table index of flat ball indices, e.g. the i and j columns of the contact buffer."""
+        return np.asarray(ball) // self.num_balls
+
+    def moving_tables(self) -> np.ndarray:
+        """(B,) bool mask of tables with a ball still moving."""
+        moving = ~self.pocketed & (self.speeds() > REST_SPEED)
+        return moving.reshape(self.batch_size, self.num_balls).any(axis=1)
+
+    def substeps_for(self, dt):
+        """(B,) substep counts, each table's worked out as BallSet.substeps_for would on its own."""
+        speeds = np.where(self.pocketed, 0.0, self.speeds()).reshape(self.batch_size, self.num_balls)
+        n = np.ceil(speeds.max(axis=1) * dt / (MAX_STEP_TRAVEL * BALL_RADIUS)).astype(np.int64)
+        return np.clip(n, 1, MAX_ADAPTIVE_SUBSTEPS)
+
+    def run_until_settled(self, max_frames: int) -> np.ndarray:
+        """
+        Steps the batch until every table has come to rest, or for at most max_frames frames.
+        Returns (B,) frames each table was still moving for; moving_tables() afterwards tells which were cut off.
+        """
+        frames = np.zeros(self.batch_size, dtype=np.int64)
+        for _ in range(max_frames):
+            moving = self.moving_tables()
+            if not moving.any():
+                break
+            frames[moving] += 1
+            self.step()
+        return frames
+
+    def step(self, dt=1.0):
+        """
+        Advances every table by dt frames. Substeps run up to the largest count in the batch;
+        a table with n substeps takes n of them, spread evenly, each dt / n frames long.
+        """
+        self.contacts.clear()
+        if not self.awake().any():
+            self.steps += 1
+            return
+        n = self.substeps_for(dt)
+        n_max = int(n.max())
+        ball_dt = np.repeat(dt / n, self.num_balls)
+        for k in range(n_max):
+            due = (k + 1) * n // n_max > k * n // n_max
+            self._substep(ball_dt, np.repeat(due, self.num_balls))
+        self.steps += 1
+
+    def _candidate_pairs(self, live, awake):
+        # Tables with no awake ball can't produce a contact, so their balls stay out of the grid
+        active_tables = awake.reshape(self.batch_size, self.num_balls).any(axis=1)
+        live = live & np.repeat(active_tables, self.num_balls)
+        return self.broad_phase.candidate_pairs(self.pos + self._offset, live, awake)
+
+def evaluate_shots(table: BallSet, angles, strengths, hit_spots="CENTER", cue: int = 0, max_frames: int = FPS * 60) -> dict:
+    """
+    Simulates many candidate cue shots from the same table state at once, each in its own copy of the table.
+
+    table:      BallSet to shoot from; it is not modified
+    angles:     (B,) shot directions in radians (the direction the cue ball is sent, before the hit spot offset)
+    strengths:  (B,) drag distances, as in main()
+    hit_spots:  a HIT_SPOT_EFFECTS key, or a (B,) sequence of them
+    cue:        index of the struck ball
+    max_frames: frames after which a table still moving is cut off
+
+    Returns a dict of per-candidate outcomes:
+        "pocketed": (B, N) bool, balls pocketed by the end of the shot
+        "pos":      (B, N, 2) final positions
+        "scratch":  (B,) bool, whether the cue ball went into a pocket
+        "frames":   (B,) frames until the table came to rest (max_frames if it didn't)
+    """
+    impulses = cue_impulses(angles, strengths, hit_spots).reshape(-1, 2)
+    batch = TableBatch(table, len(impulses))
+    batch.batch_vel[:, cue] += impulses / table.mass[cue]
+    frames = batch.run_until_settled(max_frames)
+
+    return {
+        "pocketed": batch.batch_pocketed.copy(),
+        "pos": batch.batch_pos.copy(),
+        "scratch": batch.batch_pocketed[:, cue].copy(),
+        "frames": frames,
+    }
@@ -0,0 +1,279 @@
+# bench.py
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import numpy as np
+
+# Headless: no window, no sound device, no interactive matplotlib backend
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pygame
+from constants import WIDTH, HEIGHT, INFO_HEIGHT, BALL_RADIUS, FPS, GRAPH_INTERVAL, WHITE, RED, BLUE, YELLOW, PURPLE
+from simulation import Simulation
+from physics import resolve_collision, resolve_inelastic_collision, is_in_pocket, in_pocket, resolve_inelastic_collisions
+from telemetry import Telemetry
+from renderer import TableRenderer
+from ui import draw_ball
+
+COLORS = [WHITE, RED, BLUE, YELLOW, PURPLE]
+
+BALL_COUNTS = (5, 50, 500, 2000, 5000)
+
+# Initial layouts. Above a few hundred balls the table can't hold them all without overlap; the extra
+# balls then overlap the others, which is the worst case for the collision kernels.
+LAYOUTS = ("dense", "sparse")
+
+def make_setup(layout: str, num_balls: int, seed: int = 0) -> tuple:
+    """
+    Reproducible initial state for a benchmark: (setup list for Simulation, (N, 2) velocities).
+
+    dense:  balls packed touching on a hexagonal lattice, filled outward from the middle of the table,
+            so most balls have neighbours in contact
+    sparse: balls spread uniformly over the whole table
+    Both get random velocities of up to 8 px per frame.
+    """
+    rng = np.random.default_rng(seed)
+    low, high = np.array([BALL_RADIUS, BALL_RADIUS]), np.array([WIDTH - BALL_RADIUS, HEIGHT - BALL_RADIUS])
+    if layout == "dense":
+        # Hexagonal lattice with spacing 2R; each further layer is shifted so its balls sit between the last
+        spacing = 2 * BALL_RADIUS
+        xs = np.arange(low[0], high[0], spacing)
+        ys = np.arange(low[1], high[1], spacing * np.sqrt(3) / 2)
+        lattice = np.array([(x + (r % 2) * BALL_RADIUS, y) for r, y in enumerate(ys) for x in xs])
+        lattice = lattice[lattice[:, 0] <= high[0]]
+        lattice = lattice[np.argsort(np.linalg.norm(lattice - (WIDTH / 2, HEIGHT / 2), axis=1), kind="stable")]
+        layers = -(-num_balls // len(lattice))
+        pos = np.concatenate([lattice + k * BALL_RADIUS * np.array([0.37, 0.61]) for k in range(layers)])[:num_balls]
+        pos = np.clip(pos, low, high)
+    elif layout == "sparse":
+        pos = rng.uniform(low, high, size=(num_balls, 2))
+    else:
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}.")
+
+    angle = rng.uniform(0, 2 * np.pi, num_balls)
+    speed = rng.uniform(0, 8, num_balls)
+    vel = np.stack([np.cos(angle), np.sin(angle)], axis=1) * speed[:, None]
+    setup = [(x, y, COLORS[k % len(COLORS)], "resin") for k, (x, y) in enumerate(pos)]
+    return setup, vel
+
+class Case:
+    """
+    One benchmark at one layout and ball count: a fresh Simulation in the layout's initial state,
+    plus the candidate pairs of that state for the pair kernels.
+    """
+    def __init__(self, layout: str, num_balls: int, seed: int = 0):
+        setup, vel = make_setup(layout, num_balls, seed)
+        self.sim = Simulation(setup)
+        self.table = self.sim.table
+        self.table.vel[:] = vel
+        self.balls = self.sim.balls
+        self.pairs = self.table._candidate_pairs(~self.table.pocketed, self.table.awake())
+        self._state = (self.table.pos.copy(), self.table.vel.copy(), self.table.pocketed.copy())
+
+    def reset(self) -> None:
+        """Puts the table back into its initial state, so every timed call starts from the same one."""
+        pos, vel, pocketed = self._state
+        self.table.pos[:] = pos
+        self.table.vel[:] = vel
+        self.table.pocketed[:] = pocketed
+        self.table.contacts.clear()
+
+# Benchmarks: name -> function(case) returning the callable to time. Each call is one unit of work:
+# the per-ball functions run once for every ball, the per-pair ones once for every candidate pair.
+def _ball_move(case):
+    balls, contacts = case.balls, case.table.contacts
+    def run():
+        # One frame: the contacts buffer is started once, then every ball appends its wall hits
+        contacts.clear()
+        for ball in balls:
+            ball.move()
+    return run
+
+def _pair_kernel(resolve):
+    def make(case):
+        balls = case.balls
+        pairs = list(zip(*(p.tolist() for p in case.pairs)))
+        def run():
+            for i, j in pairs:
+                resolve(balls[i], balls[j])
+        return run
+    return make
+
+def _is_in_pocket(case):
+    balls = case.balls
+    def run():
+        for ball in balls:
+            is_in_pocket(ball)
+    return run
+
+def _in_pocket(case):
+    table = case.table
+    return lambda: in_pocket(table.pos, ~table.pocketed, table.layout)
+
+def _resolve_inelastic_collisions(case):
+    table = case.table
+    live = ~table.pocketed
+    i, j = case.pairs
+    return lambda: resolve_inelastic_collisions(table.pos, table.vel, table.mass, table.material,
+                                                table.materials.restitution, live, i, j)
+
+def _table_step(case):
+    return case.sim.step
+
+def _graph_update(case):
+    # matplotlib is only loaded when this benchmark runs
+    from graph import Graph
+    graph = Graph(len(case.balls))
+    graph.update(0.0, case.balls)  # first update sets up colours and the legend; not timed
+    t = [0.0]
+    def run():
+        t[0] += GRAPH_INTERVAL
+        graph.update(t[0], case.balls)
+    return run
+
+def _frame(case):
+    """Everything main.main() does per frame except input, sound, the graph and waiting for vsync."""
+    screen = pygame.display.set_mode((WIDTH, HEIGHT + INFO_HEIGHT))
+    font = pygame.font.SysFont("Arial", 16)
+    renderer = TableRenderer(screen, font, case.table.layout)
+    telemetry = Telemetry(len(case.balls))
+    sim = case.sim
+    def run():
+        renderer.begin("CENTER")
+        sim.step()
+        telemetry.record(sim.frame / FPS, case.table)
+        screen.set_clip((0, 0, WIDTH, HEIGHT))
+        for ball in case.balls:
+            renderer.mark(draw_ball(screen, ball))
+        screen.set_clip(None)
+        renderer.present()
+    return run
+
+BENCHMARKS = {
+    "Ball.move": _ball_move,
+    "resolve_collision": _pair_kernel(resolve_collision),
+    "resolve_inelastic_collision": _pair_kernel(resolve_inelastic_collision),
+    "is_in_pocket": _is_in_pocket,
+    "in_pocket": _in_pocket,
+    "resolve_inelastic_collisions": _resolve_inelastic_collisions,
+    "BallSet.step": _table_step,
+    "Graph.update": _graph_update,
+    "frame": _frame,
+}
+
+# Fewest calls timed per benchmark, however slow
+MIN_REPEATS = 3
+
+# Benchmarks that accumulate state of their own (the graph's buffers) rather than the table's
+_NO_RESET = {"Graph.update"}
+
+def time_benchmark(name: str, case: Case, repeats: int = 20, max_time: float = 5.0) -> dict:
+    """
+    Times up to `repeats` calls of a benchmark, each from the case's initial state (restoring it isn't timed).
+    Slow cases stop early once max_time seconds were spent, after at least MIN_REPEATS calls.
+    Returns min, median, mean and standard deviation in seconds, and the number of calls timed.
+    """
+    run = BENCHMARKS[name](case)
+    run()  # warms caches; not timed
+    samples = []
+    while len(samples) < repeats and (len(samples) < MIN_REPEATS or sum(samples) < max_time):
+        if name not in _NO_RESET:
+            case.reset()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeats": len(samples),
+    }
+
+def run_suite(benchmarks=None, layouts=LAYOUTS, ball_counts=BALL_COUNTS, repeats: int = 20, max_time: float = 5.0,
+              seed: int = 0, log=print) -> dict:
+    """Runs every benchmark at every layout and ball count. Returns the results document (see save_results)."""
+    benchmarks = list(BENCHMARKS) if benchmarks is None else list(benchmarks)
+    pygame.init()
+    results = []
+    for layout in layouts:
+        for num_balls in ball_counts:
+            for name in benchmarks:
+                stats = time_benchmark(name, Case(layout, num_balls, seed), repeats, max_time)
+                results.append({"benchmark": name, "layout": layout, "balls": num_balls, **stats})
+                if log is not None:
+                    log(f"{name:<30} {layout:<7} {num_balls:>6} {stats['median'] * 1e3:10.3f} ms")
+    pygame.quit()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeats": repeats,
+            "max_time": max_time,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+def save_results(document: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(document, f, indent=1)
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10, metric: str = "min") -> list:
+    """
+    Matches results by (benchmark, layout, balls) and compares one statistic of their timings; the minimum
+    by default, as the least affected by whatever else the machine was doing.
+    Returns one row per match: (benchmark, layout, balls, baseline time, current time, ratio, status),
+    where status is "slower" if the ratio exceeds 1 + threshold, "faster" below 1 - threshold, else "same".
+    """
+    key = lambda r: (r["benchmark"], r["layout"], r["balls"])
+    before = {key(r): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        ratio = r[metric] / old[metric] if old[metric] > 0 else float("inf")
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        rows.append((*key(r), old[metric], r[metric], ratio, status))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the physics kernels, the graph and a full headless frame.")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--balls", nargs="+", type=int, default=list(BALL_COUNTS), help="ball counts to run at")
+    parser.add_argument("--repeats", type=int, default=20, help="timed calls per benchmark")
+    parser.add_argument("--max-time", type=float, default=5.0, help="seconds after which a slow benchmark stops repeating")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json", help="file to write the results to")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--metric", choices=("min", "median", "mean"), default="min", help="timing statistic compared with the baseline")
+    args = parser.parse_args()
+
+    document = run_suite(args.benchmarks, args.layouts, args.balls, args.repeats, args.max_time, args.seed)
+    save_results(document, args.out)
+    print(f"{len(document['results'])} results written to {args.out}")
+
+    if args.baseline:
+        rows = compare(document, load_results(args.baseline), args.threshold, args.metric)
+        for name, layout, balls, old, new, ratio, status in rows:
+            print(f"{name:<30} {layout:<7} {balls:>6} {old * 1e3:10.3f} -> {new * 1e3:10.3f} ms  x{ratio:5.2f}  {status}")
+        slower = sum(row[-1] == "slower" for row in rows)
+        print(f"{slower} of {len(rows)} benchmarks slower than the baseline by more than {args.threshold:.0%}")
+        # Non-zero exit so a CI step fails on a regression
+        raise SystemExit(1 if slower else 0)
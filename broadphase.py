@@ -0,0 +1,72 @@
+import numpy as np
+from constants import BALL_RADIUS, WIDTH, HEIGHT
+
+# Half of the 3x3 neighbourhood: every pair of adjacent cells is visited exactly once
+NEIGHBOUR_OFFSETS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+class SpatialHash:
+    """
+    Uniform grid broad phase. With cells of size 2 * BALL_RADIUS, two balls can only overlap
+    if they sit in the same or in adjacent cells, so only those pairs are returned as candidates.
+    """
+    def __init__(self, width: float = WIDTH, height: float = HEIGHT, cell_size: float = 2 * BALL_RADIUS):
+        self.cell_size = cell_size
+        self.cols = int(np.ceil(width / cell_size))
+        self.rows = int(np.ceil(height / cell_size))
+
+    def candidate_pairs(self, pos: np.ndarray, live: np.ndarray = None, active: np.ndarray = None) -> tuple:
+        """
+        pos:    (N, 2) ball positions
+        live:   optional (N,) bool mask; balls outside it are never paired
+        active: optional (N,) bool mask; only pairs with at least one active ball are returned
+
+        Returns two index arrays (i, j) with i < j for every candidate pair.
+        """
+        idx = np.arange(len(pos)) if live is None else np.flatnonzero(live)
+
+        # Cell coordinates, clamped so balls pushed slightly off the table still land in a cell
+        cells = np.floor(pos[idx] / self.cell_size).astype(np.intp)
+        cx = np.clip(cells[:, 0], 0, self.cols - 1)
+        cy = np.clip(cells[:, 1], 0, self.rows - 1)
+
+        # Sort balls by cell key so each cell's occupants form a contiguous run
+        key = cy * self.cols + cx
+        order = np.argsort(key, kind="stable")
+        key, cx, cy, idx = key[order], cx[order], cy[order], idx[order]
+        n = len(key)
+
+        pairs_i, pairs_j = [], []
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            ncx, ncy = cx + dx, cy + dy
+            valid = (ncx >= 0) & (ncx < self.cols) & (ncy < self.rows)
+            neighbour_key = ncy * self.cols + ncx
+
+            end = np.searchsorted(key, neighbour_key, side="right")
+            if dx == 0 and dy == 0:
+                # Same cell: only pair with the occupants sorted after this ball
+                start = np.arange(1, n + 1)
+            else:
+                start = np.searchsorted(key, neighbour_key, side="left")
+            counts = np.where(valid, np.maximum(end - start, 0), 0)
+
+            total = counts.sum()
+            if total == 0:
+                continue
+
+            # Expand each ball's [start, end) run into explicit pairs
+            a = np.repeat(np.arange(n), counts)
+            run_offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            b = np.repeat(start, counts) + run_offset
+            pairs_i.append(idx[a])
+            pairs_j.append(idx[b])
+
+        if not pairs_i:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+
+        i = np.concatenate(pairs_i)
+        j = np.concatenate(pairs_j)
+        if active is not None:
+            keep = active[i] | active[j]
+            i, j = i[keep], j[keep]
+        return np.minimum(i, j), np.maximum(i, j)
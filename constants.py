@@ -5,9 +5,14 @@ WIDTH, HEIGHT = 800, 400
 MASS = 0.17
 INFO_HEIGHT = 50
 FPS = 60
+PHYSICS_SUBSTEPS = 1 # Physics steps per 1/FPS frame; raise to run physics faster than the display
+MAX_FRAME_TIME = 0.25 # Longest frame (s) fed to the physics accumulator, so a stall can't snowball
+MAX_STEP_TRAVEL = 0.5 # Fastest ball may move at most this fraction of BALL_RADIUS per substep
+MAX_ADAPTIVE_SUBSTEPS = 64 # Upper bound on substeps per step, however fast the balls are
 BALL_RADIUS = 15
 POCKET_RADIUS = 30
 FRICTION = 0.99
+REST_SPEED = 0.01 # Balls slower than this (px per frame) are put to sleep: velocity snapped to zero until hit
 WALL_RESTITUTION = 0.85 # Coefficient of restitution for wall collisions (0 to 1)
 MAXIMUM_FORCE = 120
 CUE_STRENGTH_COEFFICIENT = 0.01 # Factor for converting mouse drag to impulse
@@ -22,8 +27,34 @@ MATERIAL_COR = {
     "steel":0.98,
 }
 
+# Cushion restitution per material; materials not listed bounce off cushions with WALL_RESTITUTION
+MATERIAL_CUSHION_COR = {}
+
+# Restitution of specific material pairs, overriding the lower COR of the two, e.g. {("ivory", "resin"): 0.92}
+MATERIAL_PAIR_COR = {}
+
+# Collision audio
+AUDIO_CHANNELS = 8 # Size of the mixer channel pool used for collision sounds
+AUDIO_MAX_PER_FRAME = 3 # Loudest collisions actually played per frame; the rest are dropped
+AUDIO_RETRIGGER_INTERVAL = 0.08 # Minimum seconds before the same ball or pair can sound again
+AUDIO_MIN_VOLUME = 0.02 # Collisions quieter than this are not played
+
+# Table definitions: (x, y, radius) of every pocket. TABLE picks the one the game uses;
+# more can be added here or loaded from a JSON file with tables.load_layout()
+SIDE_POCKET_RADIUS = 24
+TABLES = {
+    "four_pocket": [
+        (0, 0, POCKET_RADIUS), (WIDTH, 0, POCKET_RADIUS), (0, HEIGHT, POCKET_RADIUS), (WIDTH, HEIGHT, POCKET_RADIUS),
+    ],
+    "six_pocket": [
+        (0, 0, POCKET_RADIUS), (WIDTH, 0, POCKET_RADIUS), (0, HEIGHT, POCKET_RADIUS), (WIDTH, HEIGHT, POCKET_RADIUS),
+        (WIDTH / 2, 0, SIDE_POCKET_RADIUS), (WIDTH / 2, HEIGHT, SIDE_POCKET_RADIUS),
+    ],
+}
+TABLE = "four_pocket"
+
 # Define pockets at global scope
-POCKETS = [(0, 0), (WIDTH, 0), (0, HEIGHT), (WIDTH, HEIGHT)]
+POCKETS = [(x, y) for x, y, _ in TABLES[TABLE]]
 
 # Colors
 GREEN = (0, 128, 0)
@@ -64,4 +95,16 @@ HIT_SPOT_EFFECTS = {
 # Visualizations
 INFO_FONT_SCALE = 1
 VECTOR_SCALE = 1
-GRAPH_INTERVAL = 1/5 # Graph refresh intervals - use higher values if the program is lagging
\ No newline at end of file
+GRAPH_INTERVAL = 1/5 # Graph refresh intervals - use higher values if the program is lagging
+AIM_MAX_BOUNCES = 2 # Cushion bounces followed by the aim preview, per ball
+AIM_TOLERANCE = 0.5 # Drag change (px) below which the aim preview is reused rather than recomputed
+GRAPH_PROCESS = False # Draw the graph in a separate process; the game loop then only writes samples to shared memory
+
+# Recording
+RECORD_PATH = None # File to record the session to (see recorder.py), e.g. "session.rec"; None disables recording
+
+# Profiling
+PROFILE_HISTORY = 300 # Frames the profiler HUD's rolling percentiles cover (5 s at 60 FPS)
+PROFILE_TRACE_EVENTS = 1 << 16 # Phase runs kept for the trace export; older ones are overwritten
+PROFILE_HUD_INTERVAL = 1/4 # Seconds between profiler HUD refreshes, so the numbers stay readable
+PROFILE_TRACE_PATH = "profile_trace.json" # Where the T key writes the Chrome trace (open in chrome://tracing or Perfetto)
@@ -0,0 +1,82 @@
+import numpy as np
+from physics import sound_key
+
+# j value of a contact with a cushion rather than another ball
+WALL = -1
+
+# One row per contact
+CONTACT_DTYPE = np.dtype([
+    ("step", np.int64),         # BallSet step the contact happened in
+    ("i", np.int32),            # ball index
+    ("j", np.int32),            # other ball index, or WALL
+    ("impulse", np.float64),    # normal impulse magnitude applied to i (and opposite to j)
+    ("normal_speed", np.float64), # closing speed along the contact normal, before the impulse
+    ("point", np.float64, (2,)),  # contact point on the table
+])
+
+class ContactBuffer:
+    """
+    Preallocated structured array of the contacts of the latest step.
+
+    Physics appends whole batches of contacts at once; audio, diagnostics and telemetry read view() in bulk
+    afterwards, so no per-contact Python callback runs inside the step. The buffer only grows (doubling)
+    if a step produces more contacts than it has ever held.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.data = np.zeros(capacity, dtype=CONTACT_DTYPE)
+        self.size = 0
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def append(self, step: int, i, j, impulse, normal_speed, point) -> None:
+        """Adds a batch of contacts; every argument but step is an array (or scalar) of the same length."""
+        n = len(np.atleast_1d(impulse))
+        if n == 0:
+            return
+        if self.size + n > len(self.data):
+            grown = np.zeros(max(2 * len(self.data), self.size + n), dtype=CONTACT_DTYPE)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        rows = self.data[self.size:self.size + n]
+        rows["step"] = step
+        rows["i"] = i
+        rows["j"] = j
+        rows["impulse"] = impulse
+        rows["normal_speed"] = normal_speed
+        rows["point"] = point
+        self.size += n
+
+    def view(self) -> np.ndarray:
+        """Contacts recorded since the last clear(), as a view into the buffer."""
+        return self.data[:self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def walls(self) -> np.ndarray:
+        contacts = self.view()
+        return contacts[contacts["j"] == WALL]
+
+    def pairs(self) -> np.ndarray:
+        contacts = self.view()
+        return contacts[contacts["j"] != WALL]
+
+def contact_volumes(contacts: np.ndarray) -> np.ndarray:
+    """Sound volume (0 to 1) of each contact, scaled by its closing speed."""
+    return np.minimum(1.0, contacts["normal_speed"] / 20)
+
+def contact_sound_keys(contacts: np.ndarray) -> np.ndarray:
+    """Rate-limiting key of each contact: the ball for wall hits, the pair for ball contacts."""
+    i, j = contacts["i"], contacts["j"]
+    return np.where(j == WALL, sound_key(i), sound_key(i, j))
+
+def contact_ke_loss(contacts: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    """
+    Kinetic energy lost in each ball-ball contact: ΔKE = J·u - J²/(2μ),
+    with J the impulse, u the closing speed and μ = m1·m2/(m1+m2) the reduced mass.
+    """
+    m1, m2 = mass[contacts["i"]], mass[contacts["j"]]
+    reduced = m1 * m2 / (m1 + m2)
+    impulse = contacts["impulse"]
+    return impulse * contacts["normal_speed"] - impulse ** 2 / (2 * reduced)
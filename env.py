@@ -0,0 +1,83 @@
+import numpy as np
+from constants import FPS, HIT_SPOT_EFFECTS
+from ball import BallSet
+from batch import TableBatch
+from physics import cue_impulses
+
+# Hit spot of each index in the third action column
+HIT_SPOTS = list(HIT_SPOT_EFFECTS)
+
+class PoolEnv:
+    """
+    Many independent tables played in lockstep, for automated play and training.
+
+    One env step is one shot on every table: the cue ball of each table is struck with that table's action,
+    then all tables are simulated together until every one of them has come to rest. State lives in a
+    TableBatch, so positions are a (tables, balls, 2) array and nothing is looped over per table.
+
+    A table is done when the cue ball is pocketed (a scratch), when every other ball is pocketed, after
+    max_shots shots, or if it is still moving after max_frames. Done tables are reset automatically at
+    the end of step(); their final positions are returned in info["final_pos"].
+
+    setup:      list of (x, y, color, material) tuples, same format as INITIAL_SETUP
+    num_tables: number of tables B
+    max_shots:  shots per game before a table is reset
+    max_frames: longest a single shot is simulated
+    cue:        index of the cue ball
+    """
+    def __init__(self, setup, num_tables: int, max_shots: int = 50, max_frames: int = FPS * 60, cue: int = 0,
+                 layout=None, materials=None):
+        self.table = BallSet(setup, layout=layout, materials=materials)
+        self.batch = TableBatch(self.table, num_tables)
+        self.num_tables = num_tables
+        self.num_balls = len(self.table)
+        self.max_shots = max_shots
+        self.max_frames = max_frames
+        self.cue = cue
+        self.shots = np.zeros(num_tables, dtype=np.int64)
+
+    def observe(self) -> np.ndarray:
+        """(B, N, 3) observation: x, y and 1.0 for balls on the table, 0.0 for pocketed ones."""
+        batch = self.batch
+        obs = np.empty((self.num_tables, self.num_balls, 3))
+        obs[:, :, :2] = batch.batch_pos
+        obs[:, :, 2] = ~batch.batch_pocketed
+        return obs
+
+    def reset(self, tables=None) -> np.ndarray:
+        """Resets tables (a (B,) bool mask or index array; all if None) to the setup and returns the observation."""
+        self.batch.reset(tables)
+        self.shots[slice(None) if tables is None else tables] = 0
+        return self.observe()
+
+    def step(self, actions) -> tuple:
+        """
+        actions: (B, 3) array of shot angle (radians), drag strength and hit spot index into HIT_SPOTS
+
+        Returns (obs, reward, done, info):
+            obs:    (B, N, 3) observation after the shot, or after the reset for done tables
+            reward: (B,) float, balls other than the cue ball pocketed by the shot, minus 1 for a scratch
+            done:   (B,) bool
+            info:   dict of (B,) "scratch", "frames" and "truncated" arrays, plus "final_pos" (B, N, 2)
+        """
+        actions = np.asarray(actions, dtype=float).reshape(self.num_tables, 3)
+        batch, cue = self.batch, self.cue
+        hit_spots = [HIT_SPOTS[k] for k in actions[:, 2].astype(np.intp)]
+        pocketed_before = batch.batch_pocketed.copy()
+
+        batch.batch_vel[:, cue] += cue_impulses(actions[:, 0], actions[:, 1], hit_spots) / self.table.mass[cue]
+        frames = batch.run_until_settled(self.max_frames)
+        truncated = batch.moving_tables()
+        self.shots += 1
+
+        pocketed = batch.batch_pocketed
+        scratch = pocketed[:, cue].copy()
+        others = np.arange(self.num_balls) != cue
+        reward = (pocketed & ~pocketed_before)[:, others].sum(axis=1) - scratch.astype(float)
+        cleared = pocketed[:, others].all(axis=1)
+        done = scratch | cleared | truncated | (self.shots >= self.max_shots)
+
+        info = {"scratch": scratch, "frames": frames, "truncated": truncated, "final_pos": batch.batch_pos.copy()}
+        if done.any():
+            self.reset(done)
+        return self.observe(), reward, done, info
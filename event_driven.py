@@ -0,0 +1,272 @@
+import heapq
+import math
+import numpy as np
+from constants import BALL_RADIUS, WIDTH, HEIGHT, FRICTION, REST_SPEED
+from contacts import WALL as CONTACT_WALL
+
+# Time is measured in frames, like the fixed-step engine. Applying `vel *= FRICTION` every frame
+# means a ball with velocity v has moved v * travel(t) after t frames, where
+#   travel(t) = (1 - FRICTION^t) / (1 - FRICTION)
+# Every ball decays at the same rate, so relative motion between two balls is also linear in travel(t)
+# and contact times reduce to quadratics in g = travel(t).
+
+LN_FRICTION = math.log(FRICTION)
+
+WALL, POCKET, BALL = 0, 1, 2
+
+# Touching balls closing slower than this (px per frame) are in resting contact and get no event. Inelastic
+# balls in a row otherwise trade ever smaller impulses at the same instant, and rounding keeps that going forever.
+RESTING_CONTACT_SPEED = 1e-6
+
+def travel(t):
+    """Distance factor covered after t frames: v * travel(t) is the displacement."""
+    return (1 - np.power(FRICTION, t)) / (1 - FRICTION)
+
+def time_for_travel(g):
+    """Inverse of travel(). Returns inf where the ball stops before covering g."""
+    x = 1 - np.asarray(g, dtype=float) * (1 - FRICTION)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(x > 0, np.log(np.where(x > 0, x, 1)) / LN_FRICTION, np.inf)
+
+def stop_time(speed):
+    """Frames until a ball moving at `speed` drops below REST_SPEED."""
+    speed = np.asarray(speed, dtype=float)
+    with np.errstate(divide="ignore"):
+        return np.where(speed > REST_SPEED, np.log(REST_SPEED / np.maximum(speed, REST_SPEED)) / LN_FRICTION, 0.0)
+
+def first_contact(d, w, radius):
+    """
+    Smallest g >= 0 with |d + w g| = radius, for rows of relative positions d and velocities w.
+    Only approaching rows (d·w < 0) produce a contact; the others get inf.
+    """
+    a = np.einsum("kd,kd->k", w, w)
+    b = 2 * np.einsum("kd,kd->k", d, w)
+    c = np.einsum("kd,kd->k", d, d) - radius ** 2
+    disc = b * b - 4 * a * c
+    hit = (b < 0) & (disc >= 0) & (a > 0)
+    g = np.full(len(d), np.inf)
+    g[hit] = (-b[hit] - np.sqrt(disc[hit])) / (2 * a[hit])
+    # Already overlapping and approaching: contact is now
+    g[hit & (c <= 0)] = 0.0
+    return np.maximum(g, 0.0)
+
+class EventDrivenSimulation:
+    """
+    Time-of-impact solver for a BallSet. Instead of stepping every frame, it computes when the next
+    ball-ball, ball-wall or ball-pocket event happens and jumps straight to it, using a priority queue.
+    Balls touch exactly at contact, so no overlap correction is needed.
+
+    Each ball keeps its own reference time; its position is only brought up to date when it takes part in an event.
+    The BallSet is read at the start of every advance() call and written back at the end, so shots can be
+    applied to the table in between. Wall hits and ball contacts of the call go to table.contacts.
+    """
+    def __init__(self, table):
+        self.table = table
+        self.time = 0.0
+
+    # State helpers
+
+    def _sync(self, idx, t):
+        """Brings balls idx forward to time t."""
+        dt = t - self.t_ref[idx]
+        self.pos[idx] += self.vel[idx] * travel(dt)[..., None]
+        self.vel[idx] *= np.power(FRICTION, dt)[..., None]
+        self.t_ref[idx] = t
+
+    def _state_at(self, idx, t):
+        dt = t - self.t_ref[idx]
+        return self.pos[idx] + self.vel[idx] * travel(dt)[:, None], self.vel[idx] * np.power(FRICTION, dt)[:, None]
+
+    def _push(self, t, kind, i, j=-1, k=0):
+        heapq.heappush(self.queue, (t, self.seq, kind, i, j, k, self.count[i], self.count[j] if j >= 0 else 0))
+        self.seq += 1
+
+    def _predict(self, i, others):
+        """Queues the next wall and pocket event of ball i and its contacts with `others`."""
+        now = self.t_ref[i]
+        p, v = self.pos[i], self.vel[i]
+
+        # Walls: solve p + v g = R or p + v g = limit - R per axis
+        for axis, limit in ((0, WIDTH), (1, HEIGHT)):
+            if v[axis] > 0:
+                g = (limit - BALL_RADIUS - p[axis]) / v[axis]
+            elif v[axis] < 0:
+                g = (BALL_RADIUS - p[axis]) / v[axis]
+            else:
+                continue
+            t = now + float(time_for_travel(max(g, 0.0)))
+            if t < math.inf:
+                self._push(t, WALL, i, k=axis)
+
+        # Pockets: centre enters a pocket circle
+        layout = self.table.layout
+        g = first_contact(p - layout.centres, np.broadcast_to(v, layout.centres.shape), layout.radii)
+        k = int(np.argmin(g))
+        t = now + float(time_for_travel(g[k]))
+        if t < math.inf:
+            self._push(t, POCKET, i, k=k)
+
+        # Balls: relative motion, with the others brought to the same time
+        others = others[~self.pocketed[others]]
+        if len(others):
+            p_j, v_j = self._state_at(others, np.full(len(others), now))
+            d, w = p - p_j, v - v_j
+            # Touching balls that barely close are in resting contact, not a new event
+            dist = np.sqrt(np.einsum("kd,kd->k", d, d))
+            closing = -np.einsum("kd,kd->k", d, w) / np.maximum(dist, 1e-12)
+            moving = (dist > 2 * BALL_RADIUS + 1e-9) | (closing >= RESTING_CONTACT_SPEED)
+            others, d, w = others[moving], d[moving], w[moving]
+            g = first_contact(d, w, 2 * BALL_RADIUS)
+            times = now + time_for_travel(g)
+            for j, t in zip(others[np.isfinite(times)], times[np.isfinite(times)]):
+                self._push(float(t), BALL, i, int(j))
+
+    # Event handlers
+
+    def _wall(self, i, axis):
+        normal_speed = abs(self.vel[i, axis])
+        cushion = self.table.materials.cushion[self.table.material[i]]
+        self.vel[i, axis] *= -cushion
+        # Remove the rounding error so the ball is exactly on the cushion
+        limit = WIDTH if axis == 0 else HEIGHT
+        self.pos[i, axis] = np.clip(self.pos[i, axis], BALL_RADIUS, limit - BALL_RADIUS)
+        point = self.pos[i].copy()
+        point[axis] += BALL_RADIUS if self.pos[i, axis] > limit / 2 else -BALL_RADIUS
+        impulse = self.table.mass[i] * (1 + cushion) * normal_speed
+        self.table.contacts.append(self.table.steps, i, CONTACT_WALL, impulse, normal_speed, point)
+
+    def _pocket(self, i):
+        self.pocketed[i] = True
+        self.vel[i] = 0
+
+    def _collide(self, i, j):
+        delta = self.pos[i] - self.pos[j]
+        normal = delta / np.linalg.norm(delta)
+        vel_along_normal = np.dot(self.vel[i] - self.vel[j], normal)
+        if vel_along_normal >= 0:
+            return
+        m1, m2 = self.table.mass[i], self.table.mass[j]
+        cor = self.table.materials.pair_cor(self.table.material[i], self.table.material[j])
+        impulse = -(1 + cor) * vel_along_normal / (1/m1 + 1/m2)
+        self.vel[i] += impulse * normal / m1
+        self.vel[j] -= impulse * normal / m2
+        self.table.contacts.append(self.table.steps, i, j, impulse, -vel_along_normal, (self.pos[i] + self.pos[j]) / 2)
+
+    def _load(self):
+        """Copies the table's state and queues the first events of every awake ball."""
+        table = self.table
+        self.pos, self.vel, self.pocketed = table.pos.copy(), table.vel.copy(), table.pocketed.copy()
+        n = len(self.pos)
+        self.t_ref = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.queue, self.seq = [], 0
+
+        # Sleeping balls can't start an event, so only awake balls are predicted: against every sleeper
+        # and against the awake balls after them
+        awake = table.awake()
+        live = np.flatnonzero(~self.pocketed)
+        for i in np.flatnonzero(awake):
+            self._predict(i, live[~awake[live] | (live > i)])
+
+    # Public API
+
+    def next_event(self) -> float:
+        """Frames from now until the first wall, pocket or ball event on the table; inf if there is none."""
+        self._load()
+        return self.queue[0][0] if self.queue else math.inf
+
+    def fast_forward(self, max_frames: int = None) -> int:
+        """
+        Jumps the table forward by whole frames in closed form, without stepping: every ball moves
+        v * travel(k) and slows to v * FRICTION^k, and balls that would drop below REST_SPEED go to sleep
+        exactly as BallSet.step puts them. The jump stops one frame before the first cushion, pocket or
+        ball contact, so normal stepping can take over from there.
+
+        max_frames: longest jump; None jumps until every ball is at rest if nothing happens first
+
+        Returns the number of frames skipped, 0 if an event is due within the next frame
+        or a ball is still fast enough to need substeps.
+        """
+        table = self.table
+        awake = table.awake()
+        if not awake.any():
+            return 0 if max_frames is None else int(max_frames)
+        if table.substeps_for(1.0) > 1:
+            # Fast enough to need substeps, whose integration isn't the per-frame series; leave it to stepping
+            return 0
+
+        # Frame at which each ball falls asleep: the first k with speed * FRICTION^k < REST_SPEED
+        sleep_frame = np.floor(stop_time(table.speeds()[awake])) + 1
+        frames = sleep_frame.max()
+        if max_frames is not None:
+            frames = min(frames, max_frames)
+        event = self.next_event()
+        if event < math.inf:
+            frames = min(frames, math.ceil(event) - 1)
+        frames = int(max(frames, 0))
+        if frames == 0:
+            return 0
+
+        table.contacts.clear()
+        k = np.minimum(frames, sleep_frame)[:, None]
+        table.pos[awake] += table.vel[awake] * travel(k)
+        table.vel[awake] *= np.power(FRICTION, k)
+        idx = np.flatnonzero(awake)
+        table.vel[idx[sleep_frame <= frames]] = 0
+        table.steps += frames
+        self.time += frames
+        return frames
+
+
+    def advance(self, duration: float, stop_when_settled: bool = False) -> float:
+        """
+        Moves the table forward by `duration` frames, processing every event in between.
+        With stop_when_settled, stops early once every ball on the table is below REST_SPEED.
+        Returns the number of frames actually advanced.
+        """
+        table = self.table
+        table.contacts.clear()
+        self._load()
+        n = len(self.pos)
+        live = np.flatnonzero(~self.pocketed)
+
+        end = duration
+        while True:
+            if stop_when_settled:
+                # Once every ball is below REST_SPEED the table is settled, whatever is still queued
+                speeds = np.hypot(*self.vel[live].T)
+                settle = float(np.max(self.t_ref[live] + stop_time(speeds), initial=0.0))
+                end = min(duration, settle)
+            if not self.queue or self.queue[0][0] > end:
+                break
+            t, _, kind, i, j, k, count_i, count_j = heapq.heappop(self.queue)
+
+            # Skip predictions made before one of the balls changed course
+            if count_i != self.count[i] or (j >= 0 and count_j != self.count[j]):
+                continue
+
+            involved = [i] if j < 0 else [i, j]
+            self._sync(np.array(involved), t)
+            if kind == WALL:
+                self._wall(i, k)
+            elif kind == POCKET:
+                self._pocket(i)
+            else:
+                self._collide(i, j)
+
+            for b in involved:
+                self.count[b] += 1
+            live = np.flatnonzero(~self.pocketed)
+            for b in involved:
+                if not self.pocketed[b]:
+                    self._predict(b, live[live != b])
+
+        # Write everything back at the end time; balls below REST_SPEED go to sleep, as in BallSet.step
+        self._sync(np.arange(n), np.full(n, end))
+        self.vel[self.pocketed | (np.hypot(*self.vel.T) < REST_SPEED)] = 0
+        table.pos[:] = self.pos
+        table.vel[:] = self.vel
+        table.pocketed[:] = self.pocketed
+        table.steps += 1
+        self.time += end
+        return end
@@ -1,15 +1,20 @@
 # graph.py
 
 import matplotlib.pyplot as plt
-from collections import deque
-import numpy as np  # for norm if needed
+from matplotlib.collections import LineCollection
+import numpy as np
 
 class Graph:
     def __init__(self, num_balls: int, window_width: float = 10, estimated_fps: int = 60):
         """
         num_balls:      how many separate speed‐lines to plot
         window_width:   how many seconds to show on the x‐axis at once
-        estimated_fps:  approximate frames per second (used to size internal deques)
+        estimated_fps:  approximate frames per second (used to size internal buffers)
+
+        Only the speed lines are redrawn on each update: axes, ticks and legend are rendered once into a cached
+        background and blitted back. The x-axis scrolls in steps of a quarter window, so a full redraw happens
+        only every few seconds instead of on every update. All speed lines are one LineCollection, so an update
+        draws a single artist however many balls there are.
         """
         plt.ion()
         self.fig, self.ax = plt.subplots()
@@ -17,10 +22,14 @@ class Graph:
         self.scrolling = True # set to false for testing
 
         self.num_balls = num_balls
+        # Empty lines that only carry the legend entries; the data is drawn by the collection
         self.lines = []
         for i in range(num_balls):
             line, = self.ax.plot([], [], color="black")
             self.lines.append(line)
+        # animated artists are left out of full redraws and drawn by _blit
+        self.collection = LineCollection([], colors="black", animated=True)
+        self.ax.add_collection(self.collection, autolim=False)
 
         self.ax.set_xlabel("Time (s)")
         self.ax.set_ylabel("Speed")
@@ -30,12 +39,20 @@ class Graph:
         self.ax.set_ylim(0, 10)
 
         self.window_width = window_width
-        max_points = int(estimated_fps * window_width * 2)
+        self.scroll_step = window_width / 4
+        self.ax.set_xlim(0, window_width)
+
+        # Preallocated ring buffers. Every sample is written twice, at k and k + capacity,
+        # so the latest `capacity` samples are always one contiguous slice and never need copying.
+        self.capacity = int(estimated_fps * window_width * 2)
+        self.frames = np.zeros(2 * self.capacity)
+        self.speeds = np.zeros((num_balls, 2 * self.capacity))
+        self.head = 0  # next write position
+        self.size = 0  # number of valid samples
 
-        # Shared deque for time
-        self.frames = deque(maxlen=max_points)
-        # One deque of speeds per ball
-        self.speeds = [deque(maxlen=max_points) for _ in range(num_balls)]
+        # Background without the lines, refreshed on every full draw
+        self._background = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
 
         # Will be set once we know actual Ball.color values
         self._colors_configured = False
@@ -49,6 +66,7 @@ class Graph:
         if len(balls) != self.num_balls:
             raise ValueError(f"Expected {self.num_balls} balls, got {len(balls)}.")
 
+        colors = []
         for i, ball in enumerate(balls):
             # Convert RGB to Matplotlib color
             if ball.color == (255, 255, 255):
@@ -58,14 +76,29 @@ class Graph:
                 mpl_color = (r / 255.0, g / 255.0, b / 255.0)
 
             self.lines[i].set_color(mpl_color)
+            colors.append(mpl_color)
 
             # Label "Ball 1" → "Cue Ball"
             label = "Cue Ball" if i == 0 else f"Ball {i+1}"
             self.lines[i].set_label(label)
 
+        self.collection.set_colors(colors)
         self.ax.legend(loc="upper right")  # <-- Important
         self._colors_configured = True
+        self.fig.canvas.draw()
 
+    def append(self, t: float, speeds) -> None:
+        """Writes one sample into the ring buffers."""
+        k = self.head
+        self.frames[k] = self.frames[k + self.capacity] = t
+        self.speeds[:, k] = self.speeds[:, k + self.capacity] = speeds
+        self.head = (k + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def window(self) -> slice:
+        """Slice of the buffers holding the valid samples, oldest first."""
+        start = self.head if self.size == self.capacity else 0
+        return slice(start, start + self.size)
 
     def update(self, t: float, balls: list) -> None:
         """
@@ -76,31 +109,51 @@ class Graph:
         if not self._colors_configured:
             self.configure_colors(balls)
 
-        # 1) Append the current time to the shared deque
-        self.frames.append(t)
+        # 1) Append the current time and each ball's speed
+        self.append(t, [ball.speed for ball in balls])
+        self.refresh(t)
 
-        # 2) For each ball, compute its speed and append
-        for i, ball in enumerate(balls):
-            speed = getattr(ball, "speed", None)
-            if speed is None:
-                speed = np.linalg.norm(ball.vel)
-            self.speeds[i].append(speed)
-
-        # 3) Update each Line2D with its new (x, y) data
-        for i, line in enumerate(self.lines):
-            line.set_data(self.frames, self.speeds[i])
-
-        # 4) Scroll the x-axis window to [t - window_width, t], clamped at zero
-        if self.scrolling:
-            if t <= self.window_width:
-                left, right = 0, self.window_width
-            else:
-                left, right = t - self.window_width, t
-        else:
-            left, right = 0, self.window_width
+    def refresh(self, t: float) -> None:
+        """
+        Redraws the lines with everything appended so far.
 
-        self.ax.set_xlim(left, right)
+        t: current time in seconds
+        """
+        # 2) Scroll the x-axis once t runs past its right edge; only then is a full redraw needed
+        left, right = self.ax.get_xlim()
+        redraw = self.scrolling and t > right
+        if redraw:
+            right = t + self.scroll_step
+            left = right - self.window_width
+            self.ax.set_xlim(left, right)
+
+        # 3) One (time, speed) segment per ball from the visible part of the ring buffer: (num_balls, samples, 2)
+        window = self.window()
+        frames = self.frames[window]
+        first = max(np.searchsorted(frames, left) - 1, 0)
+        window = slice(window.start + first, window.stop)
+        speeds = self.speeds[:, window]
+        self.collection.set_segments(np.stack([np.broadcast_to(self.frames[window], speeds.shape), speeds], axis=-1))
+
+        if redraw:
+            self.fig.canvas.draw()
+        else:
+            self._blit()
 
-        # 5) Redraw in interactive mode
-        self.fig.canvas.draw()
         self.fig.canvas.flush_events()
+
+    def _on_draw(self, event) -> None:
+        """Caches the freshly drawn background, then puts the lines back on top."""
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.collection)
+
+    def _blit(self) -> None:
+        """Redraws only the lines over the cached background."""
+        canvas = self.fig.canvas
+        if self._background is None or not canvas.supports_blit:
+            canvas.draw()
+            return
+        canvas.restore_region(self._background)
+        self.ax.draw_artist(self.collection)
+        canvas.blit(self.ax.bbox)
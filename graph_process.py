@@ -0,0 +1,142 @@
+# graph_process.py
+
+import atexit
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from constants import FPS, GRAPH_INTERVAL
+
+# Header slots (int64) at the start of the shared block
+WRITE_COUNT, CLOSED, HEADER_SIZE = 0, 1, 2
+
+class SharedRingBuffer:
+    """
+    Fixed-size ring of float64 rows in shared memory, with a single writer and a single reader.
+
+    The writer fills a row and only then bumps the write counter, so the reader never sees a row
+    that is still being written. A reader that falls more than `capacity` rows behind skips ahead.
+    """
+    def __init__(self, capacity: int, width: int, name: str = None):
+        self.capacity = capacity
+        self.width = width
+        size = 8 * (HEADER_SIZE + capacity * width)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        self.rows = np.ndarray((capacity, width), dtype=np.float64, buffer=self.shm.buf, offset=8 * HEADER_SIZE)
+        if self.owner:
+            self.header[:] = 0
+        self.read_count = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, row) -> None:
+        count = self.header[WRITE_COUNT]
+        self.rows[count % self.capacity] = row
+        self.header[WRITE_COUNT] = count + 1
+
+    def read_new(self) -> np.ndarray:
+        """Returns a copy of every row written since the last call, oldest first."""
+        count = int(self.header[WRITE_COUNT])
+        # Leave one row of slack for the row the writer may be filling right now
+        start = max(self.read_count, count - self.capacity + 1)
+        self.read_count = count
+        if start >= count:
+            return self.rows[:0].copy()
+        idx = np.arange(start, count) % self.capacity
+        return self.rows[idx]
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header[CLOSED])
+
+    def close(self) -> None:
+        if self.owner:
+            self.header[CLOSED] = 1
+        # Drop the numpy views before releasing the mapping
+        del self.header, self.rows
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _graph_worker(name, capacity, num_balls, colors, quantity, window_width, plot_interval, estimated_fps):
+    """Child process: owns the matplotlib Graph and redraws it every plot_interval seconds."""
+    from types import SimpleNamespace
+    from graph import Graph
+
+    buffer = SharedRingBuffer(capacity, 1 + 2 * num_balls, name=name)
+    graph = Graph(num_balls, window_width=window_width, estimated_fps=estimated_fps)
+    graph.configure_colors([SimpleNamespace(color=c) for c in colors])
+    graph.ax.set_ylabel("Kinetic energy" if quantity == "kinetic_energy" else "Speed")
+    column = 1 + num_balls if quantity == "kinetic_energy" else 1
+
+    parent = mp.parent_process()
+    try:
+        while not buffer.closed and (parent is None or parent.is_alive()):
+            rows = buffer.read_new()
+            for row in rows:
+                graph.append(row[0], row[column:column + num_balls])
+            if len(rows):
+                graph.refresh(rows[-1, 0])
+            graph.fig.canvas.start_event_loop(plot_interval)
+    finally:
+        buffer.close()
+
+class SharedGraph:
+    """
+    Live graph that runs in its own process. The game loop only writes samples (time plus every ball's
+    speed and kinetic energy) into a shared-memory ring buffer; matplotlib never runs on the game thread.
+
+    num_balls:     how many balls are sampled
+    colors:        RGB color of each ball, used for the line colors
+    quantity:      "speed" or "kinetic_energy", the column the graph process plots
+    window_width:  how many seconds to show on the x-axis at once
+    plot_interval: seconds between redraws in the graph process, independent of the game's frame rate
+    estimated_fps: approximate samples written per second (used to size the graph's buffers)
+    capacity:      rows kept in the ring buffer
+    """
+    def __init__(self, num_balls: int, colors: list, quantity: str = "speed", window_width: float = 10,
+                 plot_interval: float = GRAPH_INTERVAL, estimated_fps: int = FPS, capacity: int = 4096):
+        if quantity not in ("speed", "kinetic_energy"):
+            raise ValueError(f"Unknown quantity {quantity!r}, expected 'speed' or 'kinetic_energy'.")
+        self.num_balls = num_balls
+        self.buffer = SharedRingBuffer(capacity, 1 + 2 * num_balls)
+        self._row = np.zeros(1 + 2 * num_balls)
+
+        self.process = mp.Process(
+            target=_graph_worker,
+            args=(self.buffer.name, capacity, num_balls, list(colors), quantity, window_width, plot_interval, estimated_fps),
+            daemon=True,
+        )
+        self.process.start()
+        atexit.register(self.close)
+
+    def update(self, t: float, balls: list) -> None:
+        """
+        Writes one sample; cheap enough to call every frame.
+
+        t:     current time in seconds
+        balls: list of Ball instances
+        """
+        row = self._row
+        row[0] = t
+        for i, ball in enumerate(balls):
+            speed = ball.speed
+            row[1 + i] = speed
+            row[1 + self.num_balls + i] = 0.5 * ball.mass * speed ** 2
+        self.buffer.write(row)
+
+    def close(self) -> None:
+        if self.process is None:
+            return
+        self.buffer.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
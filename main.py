@@ -2,11 +2,18 @@ import pygame
 import numpy as np
 import sys
 from constants import *
-from ball import Ball
-from physics import resolve_collision, resolve_inelastic_collision, is_in_pocket
-from ui import draw_cue, draw_restart_button, draw_hit_spot_selector
-from utils import Visualizer
+from simulation import Simulation, FixedTimestep
+from ui import draw_ball, draw_cue, draw_aim, draw_restart_button, draw_hit_spot_selector, draw_profiler
+from utils import Visualizer, text_cache
 from graph import Graph
+from graph_process import SharedGraph
+from telemetry import Telemetry
+from renderer import TableRenderer
+from audio import CollisionMixer
+from recorder import Recorder
+from snapshot import take, restore, History
+from aim import AimPredictor
+from profiler import FrameProfiler
 
 def setup_game():
     pygame.init()
@@ -16,13 +23,14 @@ def setup_game():
     clock = pygame.time.Clock()
     return screen, clock
 
-def setup_visualizations() -> Graph:
-    graph = Graph(num_balls=5)
+def setup_visualizations(colors: list):
+    if GRAPH_PROCESS:
+        return SharedGraph(num_balls=len(colors), colors=colors)
+    graph = Graph(num_balls=len(colors))
     return graph
 
 def main():
     screen, clock = setup_game()
-    graph = setup_visualizations()
     graph_interval = GRAPH_INTERVAL
     last_graph = 0.0
 
@@ -30,8 +38,15 @@ def main():
 
     visualize = False
 
+    # Per-phase frame timings; P shows them, T exports a trace
+    profiler = FrameProfiler()
+    show_profile = False
+    profile_stats, profile_version = {}, 0
+    last_profile = PROFILE_HUD_INTERVAL
+
     # Sound setup
-    col_sound = pygame.mixer.Sound("assets/audio/col-1.wav")
+    # Collisions are coalesced per frame and played on a fixed channel pool
+    col_sound = CollisionMixer(pygame.mixer.Sound("assets/audio/col-1.wav"))
 
     # Balls setup with (x, y, color, material)
     mat = 'resin'
@@ -43,127 +58,176 @@ def main():
         (WIDTH/2, HEIGHT-120, PURPLE, 'resin')
     ]
 
-    balls = [Ball(*pos) for pos in INITIAL_SETUP]
+    graph = setup_visualizations([color for _, _, color, _ in INITIAL_SETUP])
+    # Whole-session history of every ball, in bounded memory
+    telemetry = Telemetry(len(INITIAL_SETUP))
+
+    sim = Simulation(INITIAL_SETUP, col_sound)
+    if RECORD_PATH:
+        sim.recorder = Recorder(RECORD_PATH, sim.table)
+    table = sim.table
+    table.profiler = profiler
+    balls = sim.balls
     cue_ball = balls[0]
 
+    # Restarts restore the opening position; every shot can be undone
+    start = take(sim)
+    history = History()
+    # Preview of the shot being aimed; recomputed only when the aim or the table changes
+    aim = AimPredictor(table)
+
+    # Physics runs at a fixed rate; dt is the real duration of the previous frame
+    stepper = FixedTimestep(sim)
+    dt = 0.0
+
     dragging = False
     font = pygame.font.SysFont("Arial", 16)
     game_over = False
     selected_hit_spot = "CENTER"  # Default hit spot
 
+    # Static table layer is cached; only regions touched by moving parts are redrawn and pushed
+    renderer = TableRenderer(screen, font, sim.table.layout)
+
     running = True
     while running:
-        screen.fill(GREEN)
+        with profiler.phase("draw"):
+            renderer.begin(selected_hit_spot)
         mouse_pos = np.array(pygame.mouse.get_pos())
 
         # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_i:
-                    visualize = not visualize
-
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if game_over:
-                    restart_rect = draw_restart_button(screen, font)
-                    if restart_rect.collidepoint(event.pos):
-                        balls = [Ball(*pos) for pos in INITIAL_SETUP]
-                        cue_ball = balls[0]
-                        game_over = False
-                        selected_hit_spot = "CENTER" # Reset hit spot
-                else: # Not game over, check for other interactions
-                    temp_clickable_spots = draw_hit_spot_selector(pygame.Surface((0,0)), font, selected_hit_spot) # Dummy surface
+        with profiler.phase("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_i:
+                        visualize = not visualize
+                    elif event.key == pygame.K_p:
+                        show_profile = not show_profile
+                        last_profile = PROFILE_HUD_INTERVAL
+                    elif event.key == pygame.K_t:
+                        profiler.export_trace(PROFILE_TRACE_PATH)
+                    elif event.key == pygame.K_u:
+                        # Undo the last shot
+                        hit_spot = history.undo(sim)
+                        if hit_spot is not None:
+                            selected_hit_spot = hit_spot
+                            stepper.reset()
+                            game_over = False
+                    elif event.key == pygame.K_f and table.is_moving():
+                        # Skip to the end of the shot; free-rolling stretches are jumped in closed form
+                        sim.run(FPS * 60, fast_forward=True)
+                        stepper.reset()
+
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if game_over:
+                        restart_rect = draw_restart_button(screen, font)
+                        if restart_rect.collidepoint(event.pos):
+                            restore(sim, start)
+                            stepper.reset()
+                            table, balls = sim.table, sim.balls
+                            cue_ball = balls[0]
+                            game_over = False
+                            selected_hit_spot = "CENTER" # Reset hit spot
+                    else: # Not game over, check for other interactions
+                        temp_clickable_spots = draw_hit_spot_selector(pygame.Surface((0,0)), font, selected_hit_spot) # Dummy surface
                     
-                    clicked_on_spot_selector = False
-                    for spot_key, rect in temp_clickable_spots.items():
-                        if rect.collidepoint(event.pos):
-                            selected_hit_spot = spot_key
-                            clicked_on_spot_selector = True
-                            break
+                        clicked_on_spot_selector = False
+                        for spot_key, rect in temp_clickable_spots.items():
+                            if rect.collidepoint(event.pos):
+                                selected_hit_spot = spot_key
+                                clicked_on_spot_selector = True
+                                break
                     
-                    if not clicked_on_spot_selector and not any(b.is_moving() for b in balls if not b.pocketed) and not cue_ball.pocketed:
-                        dragging = True # Start dragging for a shot
-
-            elif event.type == pygame.MOUSEBUTTONUP:
-                if dragging:
-                    direction = cue_ball.pos - mouse_pos
-                    dist = np.linalg.norm(direction)
-                    if dist > 5:  # Minimum drag distance to apply force
-                        angle_offset = HIT_SPOT_EFFECTS[selected_hit_spot][3]
-                        
-                        if dist == 0: # Avoid division by zero if somehow dist is zero
-                            unit_direction = np.array([0.0,0.0])
-                        else:
-                            unit_direction = direction / dist
-                        
-                        # Rotate the unit_direction vector
-                        initial_angle = np.arctan2(unit_direction[1], unit_direction[0])
-                        modified_angle = initial_angle + angle_offset
-                        
-                        modified_unit_direction = np.array([np.cos(modified_angle), np.sin(modified_angle)])
-                        
-                        # Impulse magnitude is proportional to drag distance
-                        impulse_magnitude = dist * CUE_STRENGTH_COEFFICIENT
-                        applied_impulse = modified_unit_direction * impulse_magnitude
-                        
-                        cue_ball.vel += applied_impulse / cue_ball.mass
-                dragging = False
+                        if not clicked_on_spot_selector and not table.is_moving() and not cue_ball.pocketed:
+                            dragging = True # Start dragging for a shot
+
+                elif event.type == pygame.MOUSEBUTTONUP:
+                    if dragging:
+                        direction = cue_ball.pos - mouse_pos
+                        dist = np.linalg.norm(direction)
+                        if dist > 5:  # Minimum drag distance to apply force
+                            history.push(sim, selected_hit_spot)
+                            sim.shoot(direction, selected_hit_spot)
+                    dragging = False
 
         # Ball movement and collision
-        for i, ball in enumerate(balls):
-            ball.move(col_sound)
-            for other_ball in balls[i+1:]:
-                resolve_inelastic_collision(ball, other_ball, col_sound)
-            if is_in_pocket(ball):
-                ball.pocketed = True
+        with profiler.phase("physics"):
+            stepper.advance(dt)
+        with profiler.phase("audio"):
+            col_sound.flush()
+        with profiler.phase("telemetry"):
+            telemetry.record(elapsed_time, table)
 
         # Check game over conditions
-        if not game_over and (cue_ball.pocketed or all(ball.pocketed for ball in balls[1:])):
+        if not game_over and (cue_ball.pocketed or table.pocketed[1:].all()):
             # Auto-restart after a short delay
             pygame.time.delay(1000)  # 1 second delay
-            balls = [Ball(*pos) for pos in INITIAL_SETUP]
+            restore(sim, start)
+            stepper.reset()
+            table, balls = sim.table, sim.balls
             cue_ball = balls[0]
             selected_hit_spot = "CENTER" # Reset hit spot
 
-        # Draw game elements
-        for px, py in POCKETS:
-            pygame.draw.circle(screen, BLACK, (px, py), POCKET_RADIUS)
-
-        if not game_over:
-            draw_cue(screen, cue_ball, mouse_pos, dragging)
+        # Draw game elements, clipped to the table so they never spill over the info panel
+        with profiler.phase("draw"):
+            screen.set_clip((0, 0, WIDTH, HEIGHT))
+            if not game_over:
+                renderer.mark(draw_cue(screen, cue_ball, mouse_pos, dragging))
+                # Same minimum drag as the shot itself; a shorter drag has no direction to predict along
+                if dragging and not table.is_moving() and not cue_ball.pocketed and np.linalg.norm(cue_ball.pos - mouse_pos) > 5:
+                    prediction = aim.predict(cue_ball.pos - mouse_pos, selected_hit_spot)
+                    renderer.mark(draw_aim(screen, prediction, balls), ("aim", aim.version))
 
-        for ball in balls:
-            ball.draw(screen)
+            # Interpolated between the last two physics states
+            render_pos = stepper.positions()
+            for ball, pos in zip(balls, render_pos):
+                renderer.mark(draw_ball(screen, ball, pos))
 
-        if game_over:
-            draw_restart_button(screen, font)
+            if game_over:
+                renderer.mark(draw_restart_button(screen, font))
 
         # Draw diagnostics
-        if visualize:
-            for ball in balls:
-                Visualizer.draw_ball_data(screen, ball, font, WHITE)
-                Visualizer.draw_velocity_vector(screen, ball, YELLOW, 15, 4)
-
-        pygame.draw.rect(screen, BLACK, (0, HEIGHT, WIDTH, INFO_HEIGHT))
-        info_text_pos_y = HEIGHT + 10
-        info = f"Cue Pos: {cue_ball.pos.astype(int)} Vel: {np.round(cue_ball.vel, 2)} Spot: {HIT_SPOT_EFFECTS[selected_hit_spot][2]}"
-        screen.blit(font.render(info, True, WHITE), (10, info_text_pos_y))
-        
-        draw_hit_spot_selector(screen, font, selected_hit_spot) # Draw the selector UI
-
-        # Updates graph
-        if last_graph >= graph_interval:
-            graph.update(elapsed_time, balls)
-            last_graph -= graph_interval
-
-        dt = clock.tick(FPS) / 1000 #milliseconds
+        with profiler.phase("overlay"):
+            if visualize:
+                for ball in balls:
+                    key = tuple(np.round(ball.vel, 2))
+                    renderer.mark(Visualizer.draw_ball_data(screen, ball, font, WHITE), key)
+                    renderer.mark(Visualizer.draw_velocity_vector(screen, ball, YELLOW, 15, 4), key)
+            if show_profile:
+                # Refreshed a few times a second so the numbers can be read
+                if last_profile >= PROFILE_HUD_INTERVAL:
+                    profile_stats, profile_version = profiler.percentiles(), profile_version + 1
+                    last_profile = 0.0
+                renderer.mark(draw_profiler(screen, font, profile_stats), ("profile", profile_version))
+            screen.set_clip(None)
+
+            # Info panel and hit spot selector are part of the cached background
+            info_text_pos_y = HEIGHT + 10
+            info = f"Cue Pos: {cue_ball.pos.astype(int)} Vel: {np.round(cue_ball.vel, 2)} Spot: {HIT_SPOT_EFFECTS[selected_hit_spot][2]}"
+            renderer.mark(text_cache(font).blit(screen, info, (10, info_text_pos_y), WHITE), info)
+
+        # Updates graph; out of process it only records a sample, so it runs every frame
+        with profiler.phase("graph"):
+            if GRAPH_PROCESS:
+                graph.update(elapsed_time, balls)
+            elif last_graph >= graph_interval:
+                graph.update(elapsed_time, balls)
+                last_graph -= graph_interval
+
+        with profiler.phase("wait"):
+            dt = clock.tick(FPS) / 1000 #milliseconds
         elapsed_time += dt
         last_graph += dt
+        last_profile += dt
 
-        pygame.display.flip()
+        with profiler.phase("present"):
+            renderer.present()
+        profiler.end_frame()
 
+    if sim.recorder is not None:
+        sim.recorder.close()
     pygame.quit()
     sys.exit()
 
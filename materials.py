@@ -0,0 +1,76 @@
+import numpy as np
+from constants import MATERIAL_COR, MATERIAL_CUSHION_COR, MATERIAL_PAIR_COR, WALL_RESTITUTION
+
+class MaterialRegistry:
+    """
+    Assigns every material an integer id and precomputes its restitution coefficients, so the collision
+    kernels gather them with one fancy-index operation instead of per-pair dict lookups.
+
+    cor:      material -> coefficient of restitution (0 to 1)
+    cushion:  material -> cushion restitution; unlisted materials use WALL_RESTITUTION
+    pair_cor: (material, material) -> restitution of that pair, overriding min(cor_a, cor_b)
+
+    restitution: (M, M) float array, restitution[a, b] for materials with ids a and b
+    cushion:     (M,) float array of cushion restitution by id
+    """
+    def __init__(self, cor=MATERIAL_COR, cushion=MATERIAL_CUSHION_COR, pair_cor=MATERIAL_PAIR_COR):
+        self.names = []
+        self.ids = {}
+        self._cor = {}
+        self._cushion = {}
+        self._pair_cor = {}
+        for name, e in cor.items():
+            self.register(name, e, cushion.get(name), rebuild=False)
+        for (a, b), e in pair_cor.items():
+            self.set_pair(a, b, e, rebuild=False)
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def register(self, name: str, cor: float, cushion: float = None, rebuild: bool = True) -> int:
+        """Adds a material, or updates an existing one, and returns its id."""
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        self._cor[name] = cor
+        self._cushion[name] = WALL_RESTITUTION if cushion is None else cushion
+        if rebuild:
+            self._rebuild()
+        return self.ids[name]
+
+    def set_pair(self, a: str, b: str, cor: float, rebuild: bool = True) -> None:
+        """Overrides the restitution of collisions between materials a and b (in either order)."""
+        self.id(a), self.id(b)
+        self._pair_cor[frozenset((a, b))] = cor
+        if rebuild:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        cor = np.array([self._cor[name] for name in self.names], dtype=float)
+        # Lower COR of the two materials dominates, unless the pair has its own value
+        self.restitution = np.minimum(cor[:, None], cor[None, :])
+        for pair, e in self._pair_cor.items():
+            names = sorted(pair)  # a material paired with itself is a one-element set
+            a, b = names[0], names[-1]
+            self.restitution[self.ids[a], self.ids[b]] = self.restitution[self.ids[b], self.ids[a]] = e
+        self.cushion = np.array([self._cushion[name] for name in self.names], dtype=float)
+
+    def id(self, name: str) -> int:
+        if name not in self.ids:
+            raise ValueError(f"Unknown material {name!r}, expected one of {self.names}.")
+        return self.ids[name]
+
+    def lookup(self, names) -> np.ndarray:
+        """Ids of a list of material names, as an int array."""
+        return np.array([self.id(name) for name in names], dtype=np.intp)
+
+    def pair_cor(self, a, b):
+        """Restitution between material ids a and b; works on scalars and on id arrays."""
+        return self.restitution[a, b]
+
+# Registry built from constants, shared by every table unless one is given
+MATERIALS = MaterialRegistry()
@@ -1,7 +1,71 @@
 import numpy as np
-from constants import BALL_RADIUS, POCKET_RADIUS, POCKETS, MATERIAL_COR
+from constants import BALL_RADIUS, WIDTH, HEIGHT, WALL_RESTITUTION, CUE_STRENGTH_COEFFICIENT, HIT_SPOT_EFFECTS
+from tables import DEFAULT_LAYOUT
 
-def resolve_collision(b1, b2, col_sound): 
+def play_sound(col_sound, volume, key=None):
+    """
+    Plays col_sound at the given volume. Sound is optional: headless runs pass None.
+
+    col_sound may be a plain pygame Sound, or an audio.CollisionMixer, which coalesces and rate-limits
+    plays per key (a ball or a pair of balls).
+    """
+    if col_sound is None:
+        return
+    if hasattr(col_sound, "trigger"):
+        col_sound.trigger(volume, key)
+    else:
+        col_sound.set_volume(volume)
+        col_sound.play()
+
+def sound_key(i, j=None):
+    """
+    Integer key for rate-limiting collision sounds: ball i for wall hits, or the pair (i, j) for contacts.
+    Works on scalars and on index arrays.
+    """
+    i = np.asarray(i, dtype=np.int64)
+    if j is None:
+        return (i << 32) | 0xFFFFFFFF
+    j = np.asarray(j, dtype=np.int64)
+    return (np.minimum(i, j) << 32) | np.maximum(i, j)
+
+def cue_impulse(direction, hit_spot="CENTER"):
+    """
+    Converts a cue drag into an impulse vector.
+
+    direction: vector from the mouse to the cue ball; its length is the drag distance
+    hit_spot:  key of HIT_SPOT_EFFECTS, whose angle offset rotates the shot
+    """
+    dist = np.linalg.norm(direction)
+    if dist == 0: # Avoid division by zero if somehow dist is zero
+        return np.zeros(2)
+
+    # Rotate the unit direction by the hit spot's angle offset
+    angle_offset = HIT_SPOT_EFFECTS[hit_spot][3]
+    modified_angle = np.arctan2(direction[1], direction[0]) + angle_offset
+    modified_unit_direction = np.array([np.cos(modified_angle), np.sin(modified_angle)])
+
+    # Impulse magnitude is proportional to drag distance
+    return modified_unit_direction * dist * CUE_STRENGTH_COEFFICIENT
+
+def cue_impulses(angles, strengths, hit_spots="CENTER"):
+    """
+    Vectorized cue_impulse for a batch of shots.
+
+    angles:    (B,) shot directions in radians, before the hit spot's angle offset
+    strengths: (B,) drag distances
+    hit_spots: a HIT_SPOT_EFFECTS key, or a (B,) sequence of them
+
+    Returns a (B, 2) array of impulse vectors.
+    """
+    angles, strengths = np.broadcast_arrays(np.asarray(angles, dtype=float), np.asarray(strengths, dtype=float))
+    if isinstance(hit_spots, str):
+        offset = HIT_SPOT_EFFECTS[hit_spots][3]
+    else:
+        offset = np.array([HIT_SPOT_EFFECTS[spot][3] for spot in hit_spots], dtype=float)
+    modified_angle = angles + offset
+    return np.stack([np.cos(modified_angle), np.sin(modified_angle)], axis=-1) * (strengths * CUE_STRENGTH_COEFFICIENT)[..., None]
+
+def resolve_collision(b1, b2, col_sound=None): 
     if b1.pocketed or b2.pocketed: 
         return 
     # Calculate vector between ball centers: Δp = p₁ - p₂
@@ -21,10 +85,8 @@ def resolve_collision(b1, b2, col_sound):
     if vel_along_normal > 0:  # Balls are already separating
         return 
     
-    if col_sound is not None:
-        volume = min(1.0, abs(vel_along_normal) / 20)  # volume scaled by collision speed
-        col_sound.set_volume(volume)
-        col_sound.play()
+    volume = min(1.0, abs(vel_along_normal) / 20)  # volume scaled by collision speed
+    play_sound(col_sound, volume, sound_key(b1.index, b2.index))
 
     # Get masses
     m1 = b1.mass
@@ -50,7 +112,7 @@ def resolve_collision(b1, b2, col_sound):
     b1.pos += correction
     b2.pos -= correction
 
-def resolve_inelastic_collision(b1, b2, col_sound):
+def resolve_inelastic_collision(b1, b2, col_sound=None):
     if b1.pocketed or b2.pocketed: 
         return 
 
@@ -67,20 +129,16 @@ def resolve_inelastic_collision(b1, b2, col_sound):
         return 
 
     # Sound scaled to impact speed
-    if col_sound is not None:
-        volume = min(1.0, abs(vel_along_normal) / 20)
-        col_sound.set_volume(volume)
-        col_sound.play()
+    volume = min(1.0, abs(vel_along_normal) / 20)
+    play_sound(col_sound, volume, sound_key(b1.index, b2.index))
 
     m1, m2 = b1.mass, b2.mass
     total_mass = m1 + m2
     if total_mass <= 0:
         return
 
-    # Get restitution from materials
-    e1 = MATERIAL_COR.get(b1.material, 0.5)
-    e2 = MATERIAL_COR.get(b2.material, 0.5)
-    cor = min(e1, e2)  # conservative estimate: lower COR dominates
+    # Get restitution from materials (lower COR dominates unless the pair has an override)
+    cor = b1.ball_set.materials.pair_cor(b1.material_id, b2.material_id)
 
     # Compute impulse scalar (based on COR)
     impulse = -(1 + cor) * vel_along_normal / (1/m1 + 1/m2)
@@ -96,8 +154,91 @@ def resolve_inelastic_collision(b1, b2, col_sound):
     b2.pos -= correction
 
 def is_in_pocket(ball):
-    for px, py in POCKETS:
-        dist = np.linalg.norm(ball.pos - np.array([px, py]))
-        if dist < POCKET_RADIUS:
-            return True
-    return False
\ No newline at end of file
+    return bool(in_pocket(ball.pos[None], layout=ball.ball_set.layout)[0])
+
+# Vectorized kernels used by BallSet. All of them work on (N, 2) position/velocity arrays in place.
+
+def collide_walls(pos, vel, live, cushion=WALL_RESTITUTION):
+    """
+    Clamps live balls inside the table and reflects their velocity with each ball's cushion restitution
+    (a scalar, or a (N,) array indexed by ball).
+    Returns (ball, axis, normal_speed, point) for every wall hit, normal_speed being the speed into the cushion.
+    """
+    cushion = np.broadcast_to(np.asarray(cushion, dtype=float), (len(pos),))
+    hits = []
+    for axis, limit in ((0, WIDTH), (1, HEIGHT)):
+        low = live & (pos[:, axis] - BALL_RADIUS <= 0)
+        high = live & ~low & (pos[:, axis] + BALL_RADIUS >= limit)
+        pos[low, axis] = BALL_RADIUS
+        pos[high, axis] = limit - BALL_RADIUS
+        ball = np.flatnonzero(low | high)
+        normal_speed = np.abs(vel[ball, axis])
+        vel[ball, axis] *= -cushion[ball]
+        # Contact point is on the cushion, one radius from the centre
+        point = pos[ball].copy()
+        point[:, axis] += np.where(high[ball], BALL_RADIUS, -BALL_RADIUS)
+        hits.append((ball, np.full(len(ball), axis), normal_speed, point))
+    return tuple(np.concatenate(column) for column in zip(*hits))
+
+def resolve_inelastic_collisions(pos, vel, mass, material, restitution, live, i, j):
+    """
+    Vectorized resolve_inelastic_collision over the candidate pairs (i[k], j[k]).
+    material is the (N,) material id of every ball and restitution the registry's (M, M) matrix.
+
+    Contacts are resolved in rounds: each round takes every contact whose balls are not involved in an
+    earlier pending contact, so no ball gets two impulses from the same stale velocity. This matches
+    resolving the pairs one after another, and keeps clusters of touching balls from gaining energy.
+    Returns (i, j, impulse, normal_speed, point) for every resolved contact, normal_speed being
+    the closing speed |Δv·n| before the impulse and point the midpoint between the two centres.
+    """
+    # Δp = p_i - p_j, compared as squared distances so only touching pairs need a sqrt
+    delta = pos[i] - pos[j]
+    dist_sq = np.einsum("kd,kd->k", delta, delta)
+    touching = live[i] & live[j] & (dist_sq > 0) & (dist_sq <= (2 * BALL_RADIUS) ** 2)
+    i, j, delta = i[touching], j[touching], delta[touching]
+    dist = np.sqrt(dist_sq[touching])
+
+    # n = Δp/|Δp|, fixed from the positions at the start of the step
+    normal = delta / dist[:, None]
+    # Restitution of each pair, gathered from the material matrix
+    e = restitution[material[i], material[j]]
+    m1, m2 = mass[i], mass[j]
+
+    contacts = []
+    resolved = np.zeros(len(i), dtype=bool)
+    pending = np.arange(len(i))
+    while pending.size:
+        # A contact goes in this round if it is the first pending contact of both its balls
+        order = np.arange(pending.size)
+        first = np.full(len(pos), pending.size)
+        np.minimum.at(first, i[pending], order)
+        np.minimum.at(first, j[pending], order)
+        batch = pending[(first[i[pending]] == order) & (first[j[pending]] == order)]
+        pending = pending[(first[i[pending]] != order) | (first[j[pending]] != order)]
+
+        # Δv·n with the current velocities; ignore pairs that are already separating
+        vel_along_normal = np.einsum("kd,kd->k", vel[i[batch]] - vel[j[batch]], normal[batch])
+        approaching = vel_along_normal <= 0
+        batch, vel_along_normal = batch[approaching], vel_along_normal[approaching]
+
+        impulse = -(1 + e[batch]) * vel_along_normal / (1/m1[batch] + 1/m2[batch])
+        impulse_vec = impulse[:, None] * normal[batch]
+        vel[i[batch]] += impulse_vec / m1[batch, None]
+        vel[j[batch]] -= impulse_vec / m2[batch, None]
+
+        resolved[batch] = True
+        point = pos[j[batch]] + normal[batch] * (dist[batch] / 2)[:, None]
+        contacts.append((i[batch], j[batch], impulse, -vel_along_normal, point))
+
+    # Correct overlap: each ball moves half of (2R - |Δp|); np.add.at accumulates balls in several contacts
+    correction = normal[resolved] * ((2 * BALL_RADIUS - dist[resolved]) / 2)[:, None]
+    np.add.at(pos, i[resolved], correction)
+    np.subtract.at(pos, j[resolved], correction)
+
+    if not contacts:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0), np.empty(0), np.empty((0, 2))
+    return tuple(np.concatenate(column) for column in zip(*contacts))
+
+def in_pocket(pos, live=None, layout=DEFAULT_LAYOUT):
+    """Returns a (N,) bool mask of positions inside any pocket of `layout`."""
+    return layout.captured(pos, live)
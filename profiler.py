@@ -0,0 +1,126 @@
+# profiler.py
+
+import json
+import time
+import numpy as np
+from constants import PROFILE_HISTORY, PROFILE_TRACE_EVENTS
+
+class _Phase:
+    """Context manager timing one named phase. One instance per name is reused, so timing allocates nothing."""
+    __slots__ = ("profiler", "index", "start")
+
+    def __init__(self, profiler, index: int):
+        self.profiler = profiler
+        self.index = index
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._add(self.index, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+class _NullPhase:
+    """Stand-in used when nothing is profiled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class NullProfiler:
+    """Profiler that times nothing; phase() costs one method call. The default for tables that aren't profiled."""
+    _phase = _NullPhase()
+
+    def phase(self, name: str):
+        return self._phase
+
+NULL_PROFILER = NullProfiler()
+
+class FrameProfiler:
+    """
+    Times the phases of each frame with perf_counter_ns.
+
+    Code wraps a phase in `with profiler.phase("name"):`; phases can nest (e.g. "walls" inside "physics")
+    and can run several times a frame (substeps), in which case their times add up. end_frame() closes
+    the frame: per-phase totals go into a ring of the last PROFILE_HISTORY frames, from which percentiles()
+    gives rolling p50/p95/max, and every individual phase run goes into a ring of the last
+    PROFILE_TRACE_EVENTS events, which export_trace() writes as Chrome trace-event JSON (chrome://tracing,
+    Perfetto). A lag spike, such as a periodic graph redraw, shows up in both.
+
+    history:      frames kept for the percentiles
+    trace_events: phase runs kept for the trace
+    """
+    FRAME = "frame"  # name of the whole-frame total
+
+    def __init__(self, history: int = PROFILE_HISTORY, trace_events: int = PROFILE_TRACE_EVENTS):
+        self.names = [self.FRAME]
+        self._phases = {}
+        self._current = [0]          # ns per phase in the open frame
+        self.totals = np.zeros((history, 1))  # ms per frame per phase
+        self.frames = 0              # frames completed
+        self._frame_start = time.perf_counter_ns()
+        # Ring of phase runs for the trace: phase index, frame, perf_counter_ns at entry, duration in ns
+        self.event_phase = np.zeros(trace_events, dtype=np.int16)
+        self.event_frame = np.zeros(trace_events, dtype=np.int64)
+        self.event_start = np.zeros(trace_events, dtype=np.int64)
+        self.event_duration = np.zeros(trace_events, dtype=np.int64)
+        self._event_count = 0        # events written so far; the ring position is this mod capacity
+
+    def phase(self, name: str) -> _Phase:
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, len(self.names))
+            self.names.append(name)
+            self._current.append(0)
+            self.totals = np.hstack([self.totals, np.zeros((len(self.totals), 1))])
+        return phase
+
+    def _add(self, index: int, start: int, duration: int) -> None:
+        self._current[index] += duration
+        k = self._event_count % len(self.event_phase)
+        self.event_phase[k] = index
+        self.event_frame[k] = self.frames
+        self.event_start[k] = start
+        self.event_duration[k] = duration
+        self._event_count += 1
+
+    def end_frame(self) -> None:
+        """Closes the current frame (timed from the previous end_frame()) and opens the next."""
+        now = time.perf_counter_ns()
+        self._add(0, self._frame_start, now - self._frame_start)
+        self.totals[self.frames % len(self.totals)] = np.array(self._current) / 1e6
+        self._current = [0] * len(self.names)
+        self.frames += 1
+        self._frame_start = now
+
+    def percentiles(self, q=(50, 95, 100)) -> dict:
+        """Rolling percentiles in ms over the kept frames: name -> array of one value per q."""
+        kept = self.totals[:min(self.frames, len(self.totals))]
+        if len(kept) == 0:
+            return {}
+        values = np.percentile(kept, q, axis=0)
+        return {name: values[:, k] for k, name in enumerate(self.names)}
+
+    def trace(self) -> dict:
+        """The kept events as a Chrome trace-event document; every phase run is a complete ("X") event."""
+        capacity = len(self.event_phase)
+        # Oldest first
+        order = np.arange(self._event_count - min(self._event_count, capacity), self._event_count) % capacity
+        columns = (self.event_phase[order], self.event_frame[order], self.event_start[order] / 1e3, self.event_duration[order] / 1e3)
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {"name": self.names[phase], "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                 "ts": start, "dur": duration, "args": {"frame": frame}}
+                for phase, frame, start, duration in zip(*(c.tolist() for c in columns))
+            ],
+        }
+
+    def export_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.trace(), f)
@@ -0,0 +1,228 @@
+# recorder.py
+
+import numpy as np
+from constants import FPS
+
+MAGIC = b"POOLREC1"
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", np.int32),
+    ("num_balls", np.int32),
+    ("chunk_frames", np.int32),  # frames per chunk, the keyframe interval
+    ("fps", np.int32),
+    ("chunks", np.int64),        # chunks written so far
+    ("frames", np.int64),        # frames written so far
+])
+
+def chunk_dtype(num_balls: int, chunk_frames: int) -> np.dtype:
+    """
+    Layout of one chunk of the file: an exact keyframe followed by up to chunk_frames compact frames.
+    Every chunk has the same size, so the file after the header is a plain array of chunks.
+    """
+    n, k = num_balls, chunk_frames
+    return np.dtype([
+        ("start", np.int64),              # index of the chunk's first frame
+        ("count", np.int64),              # frames filled in this chunk
+        ("key_pos", np.float64, (n, 2)),  # exact state at frame `start`
+        ("key_vel", np.float64, (n, 2)),
+        ("key_pocketed", np.bool_, (n,)),
+        ("time", np.float64, (k,)),       # frames elapsed since the recording started
+        ("dt", np.float64, (k,)),         # length of the step that led to this frame
+        ("pos", np.float32, (k, n, 2)),   # positions, for drawing and review
+        ("pocketed", np.bool_, (k, n)),
+        ("shot_ball", np.int16, (k,)),    # ball struck just before the step into this frame, or -1
+        ("shot_impulse", np.float64, (k, 2)),
+    ])
+
+class Recorder:
+    """
+    Appends a simulation to a compact binary file, one record per physics step.
+
+    The file is a header followed by fixed-size chunks. Each chunk opens with an exact keyframe (float64
+    positions and velocities) and then holds up to chunk_frames frames of float32 positions, pocketed flags
+    and the shot taken before each step. A Replay can therefore show any frame straight from the file, and
+    rebuild the exact state at any frame by stepping at most chunk_frames steps from the keyframe before it.
+
+    Attach it to a Simulation (sim.recorder = Recorder(path, sim.table)) and every step, shot and reset
+    is recorded.
+
+    path:         file to write
+    table:        BallSet being recorded; its current state is frame 0
+    chunk_frames: frames between keyframes
+    """
+    def __init__(self, path: str, table, chunk_frames: int = FPS):
+        self.path = path
+        self.num_balls = len(table)
+        self.chunk_frames = chunk_frames
+        self.dtype = chunk_dtype(self.num_balls, chunk_frames)
+        self.header = np.zeros(1, dtype=HEADER_DTYPE)
+        self.header[0] = (MAGIC, VERSION, self.num_balls, chunk_frames, FPS, 0, 0)
+        self.file = open(path, "w+b")
+        self.chunk = np.zeros(1, dtype=self.dtype)
+        self.chunks = 0   # chunks completed
+        self.frames = 0   # frames recorded
+        self.time = 0.0
+        self._shot = None
+        self._start_chunk(table, dt=0.0)
+
+    def _chunk_offset(self, index: int) -> int:
+        return HEADER_DTYPE.itemsize + index * self.dtype.itemsize
+
+    def _start_chunk(self, table, dt: float) -> None:
+        """Opens a new chunk whose keyframe and first frame are the table's current state."""
+        chunk = self.chunk[0]
+        chunk["start"] = self.frames
+        chunk["count"] = 0
+        chunk["key_pos"] = table.pos
+        chunk["key_vel"] = table.vel
+        chunk["key_pocketed"] = table.pocketed
+        self._append(table, dt)
+
+    def _append(self, table, dt: float) -> None:
+        chunk = self.chunk[0]
+        k = chunk["count"]
+        chunk["time"][k] = self.time
+        chunk["dt"][k] = dt
+        chunk["pos"][k] = table.pos
+        chunk["pocketed"][k] = table.pocketed
+        ball, impulse = self._shot if self._shot is not None else (-1, (0.0, 0.0))
+        chunk["shot_ball"][k] = ball
+        chunk["shot_impulse"][k] = impulse
+        chunk["count"] = k + 1
+        self._shot = None
+        self.frames += 1
+
+    def shot(self, ball: int, impulse) -> None:
+        """Notes an impulse given to `ball`; it is stored with the next recorded step."""
+        impulse = np.asarray(impulse, dtype=float)
+        if self._shot is not None:
+            if self._shot[0] != ball:
+                raise ValueError("Only one ball can be struck per recorded step.")
+            impulse = self._shot[1] + impulse
+        self._shot = (ball, impulse)
+
+    def record(self, table, dt: float = 1.0) -> None:
+        """Appends the table's state after a step of dt frames."""
+        self.time += dt
+        if self.chunk[0]["count"] == self.chunk_frames:
+            self._write_chunk()
+            self.chunks += 1
+            self._start_chunk(table, dt)
+        else:
+            self._append(table, dt)
+
+    def restart(self, table) -> None:
+        """
+        Records a jump to a new state that no step led to, e.g. a table rebuilt by Simulation.reset().
+        The state becomes a keyframe, so replays never step across the jump.
+        """
+        self._write_chunk()
+        self.chunks += 1
+        self._start_chunk(table, dt=0.0)
+
+    def _write_chunk(self) -> None:
+        self.file.seek(self._chunk_offset(self.chunks))
+        self.file.write(self.chunk.tobytes())
+
+    def flush(self) -> None:
+        """Writes everything recorded so far, so a Replay can open the file while recording goes on."""
+        self._write_chunk()
+        self.header[0]["chunks"] = self.chunks + 1
+        self.header[0]["frames"] = self.frames
+        self.file.seek(0)
+        self.file.write(self.header.tobytes())
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+class Replay:
+    """
+    Memory-mapped reader of a Recorder file. Nothing is loaded up front; frames are read
+    from the mapping as they are asked for, so opening and seeking a long recording is instant.
+    """
+    def __init__(self, path: str):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a pool recording.")
+        if header[0]["version"] != VERSION:
+            raise ValueError(f"{path} has version {header[0]['version']}, expected {VERSION}.")
+        self.header = header[0]
+        self.num_balls = int(self.header["num_balls"])
+        self.chunk_frames = int(self.header["chunk_frames"])
+        self.fps = int(self.header["fps"])
+        self.frames = int(self.header["frames"])
+        self.chunks = np.memmap(path, dtype=chunk_dtype(self.num_balls, self.chunk_frames), mode="r",
+                                offset=HEADER_DTYPE.itemsize, shape=(int(self.header["chunks"]),))
+        # First frame of every chunk, to find the chunk holding a frame
+        self.starts = np.array(self.chunks["start"])
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def _locate(self, frame: int) -> tuple:
+        if not 0 <= frame < self.frames:
+            raise IndexError(f"Frame {frame} out of range (recording has {self.frames}).")
+        c = int(np.searchsorted(self.starts, frame, side="right")) - 1
+        return c, frame - int(self.starts[c])
+
+    @property
+    def duration(self) -> float:
+        """Recorded time in seconds."""
+        c, k = self._locate(self.frames - 1)
+        return float(self.chunks[c]["time"][k]) / self.fps
+
+    def frame_at(self, seconds: float) -> int:
+        """Index of the last frame at or before `seconds` into the recording."""
+        target = seconds * self.fps
+        # Each chunk's first time is its keyframe's, so the chunk comes from a search over those
+        first_times = self.chunks["time"][:, 0]
+        c = max(int(np.searchsorted(first_times, target, side="right")) - 1, 0)
+        times = self.chunks[c]["time"][:self.chunks[c]["count"]]
+        return int(self.starts[c]) + max(int(np.searchsorted(times, target, side="right")) - 1, 0)
+
+    def positions(self, frame: int) -> np.ndarray:
+        """(N, 2) float32 positions at a frame, read straight from the file."""
+        c, k = self._locate(frame)
+        return np.array(self.chunks[c]["pos"][k])
+
+    def pocketed(self, frame: int) -> np.ndarray:
+        c, k = self._locate(frame)
+        return np.array(self.chunks[c]["pocketed"][k])
+
+    def shots(self) -> list:
+        """(frame, ball, impulse) of every recorded shot, in order."""
+        result = []
+        for c in range(len(self.chunks)):
+            count = self.chunks[c]["count"]
+            balls = self.chunks[c]["shot_ball"][:count]
+            for k in np.flatnonzero(balls >= 0):
+                result.append((int(self.starts[c]) + int(k), int(balls[k]), np.array(self.chunks[c]["shot_impulse"][k])))
+        return result
+
+    def seek(self, sim, frame: int) -> None:
+        """
+        Puts a Simulation into the exact state of a frame: loads the keyframe before it and steps
+        forward (at most chunk_frames steps), replaying the recorded shots.
+        sim must have the setup and engine of the recorded one; its recorder and sound are not used.
+        """
+        c, k = self._locate(frame)
+        chunk = self.chunks[c]
+        table = sim.table
+        table.pos[:] = chunk["key_pos"]
+        table.vel[:] = chunk["key_vel"]
+        table.pocketed[:] = chunk["key_pocketed"]
+        for step in range(1, k + 1):
+            ball = chunk["shot_ball"][step]
+            if ball >= 0:
+                table.vel[ball] += chunk["shot_impulse"][step] / table.mass[ball]
+            if sim.solver is not None:
+                sim.solver.advance(chunk["dt"][step])
+            else:
+                table.step(chunk["dt"][step])
+        sim.frame = float(chunk["time"][k])
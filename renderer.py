@@ -0,0 +1,74 @@
+import pygame
+from constants import WIDTH, HEIGHT, INFO_HEIGHT, GREEN, BLACK
+from tables import TableLayout, DEFAULT_LAYOUT
+from ui import draw_hit_spot_selector
+
+class TableRenderer:
+    """
+    Dirty-rectangle renderer for the pool window.
+
+    The table, pockets, info panel and hit spot selector are pre-rendered into a cached background.
+    Each frame, begin() restores the background only where the previous frame drew something,
+    the caller draws the moving parts and reports their rects with mark(), and present() pushes just
+    those regions with pygame.display.update(rects). If nothing changed since the last frame, nothing is pushed.
+
+    layout: TableLayout whose pockets are drawn (DEFAULT_LAYOUT if None)
+    """
+    def __init__(self, screen: pygame.Surface, font: pygame.font.Font, layout: TableLayout = None):
+        self.screen = screen
+        self.font = font
+        self.layout = layout if layout is not None else DEFAULT_LAYOUT
+        self.background = None
+        self.selected_hit_spot = None
+        self._previous = []   # (rect, key) drawn last frame
+        self._current = []    # (rect, key) drawn this frame
+        self._full_redraw = True
+
+    def _render_background(self, selected_hit_spot: str) -> None:
+        """Draws everything that doesn't move: felt, pockets, info panel and the hit spot selector."""
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill(GREEN)
+        for (px, py), radius in zip(self.layout.centres, self.layout.radii):
+            pygame.draw.circle(background, BLACK, (px, py), radius)
+        pygame.draw.rect(background, BLACK, (0, HEIGHT, WIDTH, INFO_HEIGHT))
+        draw_hit_spot_selector(background, self.font, selected_hit_spot)
+        self.background = background
+        self.selected_hit_spot = selected_hit_spot
+
+    def invalidate(self) -> None:
+        """Forces the next frame to be redrawn and pushed in full."""
+        self._full_redraw = True
+
+    def begin(self, selected_hit_spot: str) -> None:
+        """Erases last frame's moving parts. Rebuilds the background when the selected hit spot changes."""
+        if self.background is None or selected_hit_spot != self.selected_hit_spot:
+            self._render_background(selected_hit_spot)
+            self._full_redraw = True
+
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect, _ in self._previous:
+                self.screen.blit(self.background, rect, rect)
+        self._current = []
+
+    def mark(self, rect: pygame.Rect, key=None) -> None:
+        """
+        Records a region drawn this frame.
+
+        rect: rect returned by the draw call; None (nothing drawn) is ignored
+        key:  identifies what was drawn, for content that can change without moving (e.g. the text string)
+        """
+        if rect is not None and rect.width and rect.height:
+            self._current.append((rect, key))
+
+    def present(self) -> None:
+        """Pushes the changed regions to the display."""
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        elif self._current != self._previous:
+            # Old regions to clear the previous frame, new ones to show this frame
+            rects = [rect for rect, _ in self._previous] + [rect for rect, _ in self._current]
+            pygame.display.update(rects)
+        self._previous = self._current
@@ -0,0 +1,192 @@
+import numpy as np
+from constants import FPS, PHYSICS_SUBSTEPS, MAX_FRAME_TIME
+from ball import BallSet
+from physics import cue_impulse
+from event_driven import EventDrivenSimulation
+from contacts import contact_volumes, contact_sound_keys
+from physics import play_sound
+
+class Simulation:
+    """
+    Headless pool table. Holds a BallSet and steps it as fast as the CPU allows;
+    nothing here needs pygame. Rendering and audio are optional front-ends:
+    pass a col_sound to hear collisions, and draw from `balls` between steps.
+
+    setup:     list of (x, y, color, material) tuples, same format as INITIAL_SETUP
+    engine:    "fixed" steps every frame; "event" jumps between collision events (see event_driven.py)
+    layout:    TableLayout with the pockets of the table (DEFAULT_LAYOUT if None)
+    materials: MaterialRegistry for the balls' materials (MATERIALS if None)
+    """
+    def __init__(self, setup, col_sound=None, engine="fixed", layout=None, materials=None):
+        if engine not in ("fixed", "event"):
+            raise ValueError(f"Unknown engine {engine!r}, expected 'fixed' or 'event'.")
+        self.setup = list(setup)
+        self.col_sound = col_sound
+        self.engine = engine
+        self.layout = layout
+        self.materials = materials
+        self.recorder = None  # recorder.Recorder that every step and shot is written to, if set
+        self.reset()
+
+    def reset(self) -> None:
+        """Rebuilds the table from the initial setup."""
+        self.table = BallSet(self.setup, layout=self.layout, materials=self.materials)
+        self.balls = self.table.balls
+        self.solver = EventDrivenSimulation(self.table) if self.engine == "event" else None
+        self.frame = 0
+        if self.recorder is not None:
+            self.recorder.restart(self.table)
+
+    @property
+    def elapsed_time(self) -> float:
+        """Simulated time in seconds, independent of wall-clock time."""
+        return self.frame / FPS
+
+    def shoot(self, direction, hit_spot="CENTER", ball=0) -> None:
+        """
+        Applies a cue shot the same way main() does.
+
+        direction: vector from the mouse to the ball; its length is the drag distance
+        hit_spot:  key of HIT_SPOT_EFFECTS
+        ball:      index of the struck ball (the cue ball by default)
+        """
+        self.apply_impulse(cue_impulse(direction, hit_spot), ball)
+
+    def apply_impulse(self, impulse, ball=0) -> None:
+        impulse = np.asarray(impulse, dtype=float)
+        self.table.vel[ball] += impulse / self.table.mass[ball]
+        if self.recorder is not None:
+            self.recorder.shot(ball, impulse)
+
+    def step(self, dt: float = 1.0) -> None:
+        """Advances dt frames (1.0 = one 1/FPS frame). The step's contacts are left in table.contacts."""
+        if self.solver is not None:
+            self.solver.advance(dt)
+        else:
+            self.table.step(dt)
+        self.frame += dt
+        if self.recorder is not None:
+            self.recorder.record(self.table, dt)
+        self.play_contacts()
+
+    def play_contacts(self) -> None:
+        """
+        Sends the latest step's contacts to the sound front-end, if any: all of them to a CollisionMixer,
+        or a single play at the loudest one to a plain Sound.
+        """
+        contacts = self.table.contacts.view()
+        if self.col_sound is None or not len(contacts):
+            return
+        volumes = contact_volumes(contacts)
+        if hasattr(self.col_sound, "submit"):
+            self.col_sound.submit(volumes, contact_sound_keys(contacts))
+        else:
+            play_sound(self.col_sound, volumes.max())
+
+    def fast_forward(self, frames: int = None) -> int:
+        """
+        Skips up to `frames` frames (or until the table is at rest) in closed form, stopping one frame before
+        the next cushion, pocket or ball contact. Returns the number of frames skipped; step() takes over from there.
+        Nothing is skipped while a recorder is attached, since every frame has to be recorded.
+        """
+        if self.recorder is not None:
+            return 0
+        solver = self.solver if self.solver is not None else EventDrivenSimulation(self.table)
+        skipped = solver.fast_forward(frames)
+        self.frame += skipped
+        return skipped
+
+    @property
+    def settled(self) -> bool:
+        """True once every ball on the table is at rest."""
+        return self.table.settled
+
+    def state(self) -> dict:
+        """Copy of the current state."""
+        return {
+            "frame": self.frame,
+            "pos": self.table.pos.copy(),
+            "vel": self.table.vel.copy(),
+            "pocketed": self.table.pocketed.copy(),
+        }
+
+    def run(self, steps: int, stop_when_settled: bool = True, record: bool = False, fast_forward: bool = False) -> dict:
+        """
+        Advances up to `steps` frames.
+
+        stop_when_settled: stop as soon as no ball on the table is moving
+        record:            also return the (T, N, 2) position history
+        fast_forward:      skip the free-rolling stretches between contacts in closed form (ignored when recording,
+                           or while a recorder is attached)
+
+        Returns the final state, plus "history" when record is set.
+        With the event engine, no recording and no recorder attached, the table jumps straight from event
+        to event, so `frame` may end on a fractional value. A recorder gets every frame, so it is stepped instead.
+        """
+        if self.solver is not None and not record and self.recorder is None:
+            self.frame += self.solver.advance(steps, stop_when_settled)
+            return self.state()
+
+        history = [] if record else None
+        done = 0
+        while done < steps:
+            if fast_forward and not record:
+                done += self.fast_forward(steps - done)
+                if done >= steps or (stop_when_settled and self.table.settled):
+                    break
+            self.step()
+            done += 1
+            if record:
+                history.append(self.table.pos.copy())
+            if stop_when_settled and self.table.settled:
+                break
+
+        result = self.state()
+        if record:
+            result["history"] = np.array(history).reshape(-1, len(self.table), 2)
+        return result
+
+class FixedTimestep:
+    """
+    Runs a Simulation at a fixed physics rate, independent of how fast frames are rendered.
+
+    Real frame time goes into an accumulator, which is drained in steps of 1 / (FPS * substeps) seconds.
+    A slow frame therefore produces more physics steps on the next one instead of slowing the table down.
+    The leftover fraction of a step is used to interpolate positions between the last two physics states.
+    """
+    def __init__(self, sim: Simulation, substeps: int = PHYSICS_SUBSTEPS, max_frame_time: float = MAX_FRAME_TIME):
+        self.sim = sim
+        self.substeps = substeps
+        self.step_time = 1 / (FPS * substeps) # seconds per physics step
+        self.max_frame_time = max_frame_time
+        self.reset()
+
+    def reset(self) -> None:
+        """Call after the table is rebuilt, so nothing is interpolated across the jump."""
+        self.accumulator = 0.0
+        self.prev_pos = self.sim.table.pos.copy()
+
+    def advance(self, frame_time: float) -> int:
+        """
+        frame_time: real seconds since the last call
+
+        Returns the number of physics steps taken.
+        """
+        self.accumulator += min(frame_time, self.max_frame_time)
+        steps = 0
+        while self.accumulator >= self.step_time:
+            self.prev_pos[:] = self.sim.table.pos
+            self.sim.step(1 / self.substeps)
+            self.accumulator -= self.step_time
+            steps += 1
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far (0 to 1) the render time is between the previous and the current physics state."""
+        return self.accumulator / self.step_time
+
+    def positions(self) -> np.ndarray:
+        """(N, 2) positions to draw this frame."""
+        cur = self.sim.table.pos
+        return self.prev_pos + (cur - self.prev_pos) * self.alpha
@@ -0,0 +1,120 @@
+# snapshot.py
+
+from functools import lru_cache
+import numpy as np
+from constants import HIT_SPOT_EFFECTS
+
+# Index of each hit spot in a snapshot
+HIT_SPOTS = list(HIT_SPOT_EFFECTS)
+
+@lru_cache(maxsize=None)
+def snapshot_dtype(num_balls: int) -> np.dtype:
+    """Layout of one snapshot: everything needed to put a table back exactly as it was."""
+    n = num_balls
+    return np.dtype([
+        ("frame", np.float64),       # Simulation.frame
+        ("steps", np.int64),         # BallSet.steps
+        ("hit_spot", np.int8),       # selected hit spot, index into HIT_SPOTS
+        ("pos", np.float64, (n, 2)),
+        ("vel", np.float64, (n, 2)),
+        ("mass", np.float64, (n,)),
+        ("material", np.int32, (n,)),  # ids into the table's MaterialRegistry
+        ("pocketed", np.bool_, (n,)),
+    ])
+
+def take(sim, hit_spot: str = "CENTER") -> bytes:
+    """
+    Captures a Simulation's table and the selected hit spot into one compact, immutable buffer.
+    Equal states give equal buffers, so they can be compared and hashed directly.
+    """
+    table = sim.table
+    record = np.zeros(1, dtype=snapshot_dtype(len(table)))
+    record["frame"] = sim.frame
+    record["steps"] = table.steps
+    record["hit_spot"] = HIT_SPOTS.index(hit_spot)
+    record["pos"] = table.pos
+    record["vel"] = table.vel
+    record["mass"] = table.mass
+    record["material"] = table.material
+    record["pocketed"] = table.pocketed
+    return record.tobytes()
+
+def restore(sim, snapshot: bytes) -> str:
+    """
+    Puts a Simulation back into a snapshot's state by copying into its existing arrays;
+    no Ball is rebuilt. Returns the hit spot that was selected.
+    """
+    table = sim.table
+    record = np.frombuffer(snapshot, dtype=snapshot_dtype(len(table)))[0]
+    table.pos[:] = record["pos"]
+    table.vel[:] = record["vel"]
+    table.mass[:] = record["mass"]
+    table.material[:] = record["material"]
+    table.pocketed[:] = record["pocketed"]
+    table.steps = int(record["steps"])
+    sim.frame = float(record["frame"])
+    if sim.recorder is not None:
+        sim.recorder.restart(table)
+    return HIT_SPOTS[record["hit_spot"]]
+
+def restore_batch(batch, snapshot: bytes, tables=None) -> None:
+    """Copies a snapshot into tables of a TableBatch (a (B,) bool mask or index array; all if None)."""
+    tables = slice(None) if tables is None else tables
+    record = np.frombuffer(snapshot, dtype=snapshot_dtype(batch.num_balls))[0]
+    shape = (batch.batch_size, batch.num_balls)
+    batch.batch_pos[tables] = record["pos"]
+    batch.batch_vel[tables] = record["vel"]
+    batch.mass.reshape(shape)[tables] = record["mass"]
+    batch.material.reshape(shape)[tables] = record["material"]
+    batch.batch_pocketed[tables] = record["pocketed"]
+
+class SnapshotStore:
+    """
+    Keeps snapshots by id. Identical snapshots are stored once: adding one that is already
+    in the store returns the existing id.
+    """
+    def __init__(self):
+        self._ids = {}      # snapshot -> id
+        self._snapshots = []
+
+    def add(self, snapshot: bytes) -> int:
+        id = self._ids.get(snapshot)
+        if id is None:
+            id = self._ids[snapshot] = len(self._snapshots)
+            self._snapshots.append(snapshot)
+        return id
+
+    def __getitem__(self, id: int) -> bytes:
+        return self._snapshots[id]
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+class History:
+    """
+    Undo stack of table states, e.g. one entry per shot.
+
+    store: SnapshotStore the states are kept in (a new one if None); sharing one between
+           histories, such as branches of a search, stores common positions once
+    limit: most entries kept; the oldest are forgotten first
+    """
+    def __init__(self, store: SnapshotStore = None, limit: int = 256):
+        self.store = store if store is not None else SnapshotStore()
+        self.limit = limit
+        self._stack = []
+
+    def push(self, sim, hit_spot: str = "CENTER") -> int:
+        """Saves the current state; returns its snapshot id."""
+        id = self.store.add(take(sim, hit_spot))
+        self._stack.append(id)
+        del self._stack[:-self.limit]
+        return id
+
+    def undo(self, sim):
+        """Restores the most recently pushed state and drops it. Returns its hit spot, or None if there is nothing to undo."""
+        if not self._stack:
+            return None
+        return restore(sim, self.store[self._stack.pop()])
+
+    def __len__(self) -> int:
+        return len(self._stack)
@@ -0,0 +1,135 @@
+# sweep.py
+
+import argparse
+import itertools
+import multiprocessing as mp
+import time
+import numpy as np
+from constants import WIDTH, HEIGHT, BALL_RADIUS, FPS, FRICTION, MATERIAL_COR, WHITE, RED, BLUE, YELLOW
+from simulation import Simulation
+from contacts import contact_ke_loss
+
+# Ball positions of each initial layout; ball 0 is the cue ball, the rest get the object material
+LAYOUTS = {
+    # Same as tester.py: a straight shot at a single ball
+    "straight": [(WIDTH/2, HEIGHT/2), (650, HEIGHT/2)],
+    # Object ball half a radius off the line of the shot
+    "cut": [(WIDTH/2, HEIGHT/2), (650, HEIGHT/2 + BALL_RADIUS / 2)],
+    # Two touching object balls
+    "cluster": [(WIDTH/2, HEIGHT/2), (600, HEIGHT/2 - BALL_RADIUS), (600, HEIGHT/2 + BALL_RADIUS)],
+}
+COLORS = [WHITE, RED, BLUE, YELLOW]
+
+# Columns of the results file, in order
+COLUMNS = ("cue_material", "object_material", "layout", "strength", "angle", "ke_initial", "ke_loss",
+           "ke_loss_fraction", "momentum_error", "contacts", "settle_time", "pocketed", "scratch")
+
+def expand_grid(materials=None, strengths=(0.5, 1, 2, 4), angles=(0, 5, 10), layouts=None) -> list:
+    """
+    Every combination of the given parameters, as a list of run dicts.
+
+    materials: material names; every ordered (cue, object) pair of them is run. All of MATERIAL_COR if None
+    strengths: impulse magnitudes given to the cue ball, as in tester.py
+    angles:    shot directions in degrees, 0 pointing right
+    layouts:   names of entries in LAYOUTS; all of them if None
+    """
+    materials = list(MATERIAL_COR) if materials is None else list(materials)
+    layouts = list(LAYOUTS) if layouts is None else list(layouts)
+    return [
+        {"cue_material": cue, "object_material": obj, "layout": layout, "strength": float(strength), "angle": float(angle)}
+        for cue, obj, layout, strength, angle in itertools.product(materials, materials, layouts, strengths, angles)
+    ]
+
+def run_experiment(run: dict, max_frames: int = FPS * 120) -> dict:
+    """
+    Runs one shot headlessly until the table settles and returns the run dict extended with its metrics:
+        ke_initial:       kinetic energy right after the shot
+        ke_loss:          energy lost in ball-ball contacts (cushions and friction not included)
+        ke_loss_fraction: ke_loss / ke_initial
+        momentum_error:   largest relative change of total momentum across a step whose only events were
+                          ball-ball contacts (no cushion, pocket or ball going to sleep), after taking
+                          friction out; 0 for an exact solver
+        contacts:         number of ball-ball contacts
+        settle_time:      seconds until every ball was at rest (max_frames / FPS if it never was)
+        pocketed:         balls pocketed, cue ball included
+        scratch:          whether the cue ball was pocketed
+    """
+    positions = LAYOUTS[run["layout"]]
+    setup = [(x, y, COLORS[k % len(COLORS)], run["cue_material"] if k == 0 else run["object_material"])
+             for k, (x, y) in enumerate(positions)]
+    sim = Simulation(setup)
+    table = sim.table
+    angle = np.radians(run["angle"])
+    sim.apply_impulse(run["strength"] * np.array([np.cos(angle), np.sin(angle)]))
+    ke_initial = 0.5 * np.sum(table.mass * table.speeds() ** 2)
+
+    ke_loss, momentum_error, contacts = 0.0, 0.0, 0
+    while sim.frame < max_frames and not sim.settled:
+        # Free rolling between contacts is skipped in closed form
+        sim.fast_forward(max_frames - sim.frame)
+        if sim.frame >= max_frames or sim.settled:
+            break
+        momentum_before = table.mass @ table.vel
+        pocketed_before = table.pocketed.sum()
+        awake_before = table.awake()
+        sim.step()
+        pairs = table.contacts.pairs()
+        if not len(pairs):
+            continue
+        contacts += len(pairs)
+        ke_loss += contact_ke_loss(pairs, table.mass).sum()
+        fell_asleep = (awake_before & ~table.awake()).any()
+        if len(pairs) == len(table.contacts) and table.pocketed.sum() == pocketed_before and not fell_asleep:
+            # Friction scales every velocity by FRICTION per frame; contacts should leave the total unchanged
+            expected = momentum_before * FRICTION
+            error = np.linalg.norm(table.mass @ table.vel - expected) / max(np.linalg.norm(expected), 1e-12)
+            momentum_error = max(momentum_error, error)
+
+    return dict(run,
+        ke_initial=ke_initial,
+        ke_loss=ke_loss,
+        ke_loss_fraction=ke_loss / ke_initial if ke_initial > 0 else 0.0,
+        momentum_error=momentum_error,
+        contacts=contacts,
+        settle_time=sim.frame / FPS,
+        pocketed=int(table.pocketed.sum()),
+        scratch=bool(table.pocketed[0]),
+    )
+
+def run_sweep(runs: list, path: str = "sweep_results.npz", processes: int = None, chunksize: int = 4) -> dict:
+    """
+    Runs every experiment across a process pool (one process per core by default) and writes
+    the results to `path` as one .npz file with an array per column (see COLUMNS).
+    Returns the columns as a dict of arrays.
+    """
+    with mp.Pool(processes) as pool:
+        results = pool.map(run_experiment, runs, chunksize=chunksize)
+    columns = {name: np.array([r[name] for r in results]) for name in COLUMNS}
+    np.savez(path, **columns)
+    return columns
+
+def load_results(path: str = "sweep_results.npz") -> dict:
+    """Reads a results file written by run_sweep back into a dict of column arrays."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of collision experiments headlessly on every core.")
+    parser.add_argument("--materials", nargs="+", choices=list(MATERIAL_COR), help="materials to pair up (default: all)")
+    parser.add_argument("--strengths", nargs="+", type=float, default=[0.5, 1, 2, 4])
+    parser.add_argument("--angles", nargs="+", type=float, default=[0, 5, 10], help="shot directions in degrees")
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS))
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--out", default="sweep_results.npz")
+    args = parser.parse_args()
+
+    runs = expand_grid(args.materials, args.strengths, args.angles, args.layouts)
+    start = time.perf_counter()
+    columns = run_sweep(runs, args.out, args.processes)
+    print(f"{len(runs)} runs in {time.perf_counter() - start:.1f}s, results written to {args.out}")
+
+    # Mean fraction of energy lost in contacts, per material pair
+    for cue, obj in sorted(set(zip(columns["cue_material"], columns["object_material"]))):
+        rows = (columns["cue_material"] == cue) & (columns["object_material"] == obj)
+        print(f"{cue:>10} -> {obj:<10} KE lost {columns['ke_loss_fraction'][rows].mean():6.1%}  "
+              f"momentum error {columns['momentum_error'][rows].max():.1e}  settle {columns['settle_time'][rows].mean():5.1f}s")
@@ -0,0 +1,57 @@
+import json
+import numpy as np
+from constants import TABLES, TABLE
+
+class TableLayout:
+    """
+    Pocket geometry of a table, kept as arrays so pocket capture is one batched test per step.
+
+    pockets: list of (x, y, radius) tuples, one per pocket
+
+    centres: (K, 2) float array of pocket centres
+    radii:   (K,) float array of pocket radii
+    """
+    def __init__(self, pockets, name: str = "custom"):
+        pockets = np.asarray(pockets, dtype=float).reshape(-1, 3)
+        self.name = name
+        self.centres = pockets[:, :2].copy()
+        self.radii = pockets[:, 2].copy()
+        # A ball is captured when |p - c|² < r², so the square roots are never taken
+        self.radii_sq = self.radii ** 2
+
+    def __len__(self) -> int:
+        return len(self.radii)
+
+    def captured(self, pos: np.ndarray, live: np.ndarray = None) -> np.ndarray:
+        """
+        pos:  (N, 2) ball positions
+        live: optional (N,) bool mask; balls outside it are never captured
+
+        Returns a (N,) bool mask of balls whose centre is inside a pocket.
+        """
+        idx = np.arange(len(pos)) if live is None else np.flatnonzero(live)
+        hit = np.zeros(len(pos), dtype=bool)
+        if len(idx) == 0:
+            return hit
+        # (n, K) squared distances from every live ball to every pocket centre
+        delta = pos[idx, None, :] - self.centres
+        dist_sq = np.einsum("nkd,nkd->nk", delta, delta)
+        hit[idx] = np.any(dist_sq < self.radii_sq, axis=1)
+        return hit
+
+def load_layout(source=TABLE) -> TableLayout:
+    """
+    Builds a TableLayout from a table definition.
+
+    source: name of an entry in TABLES, or path to a JSON file holding a list of [x, y, radius]
+            (or {"x": .., "y": .., "radius": ..}) pockets
+    """
+    if source in TABLES:
+        return TableLayout(TABLES[source], name=source)
+    with open(source) as f:
+        pockets = json.load(f)
+    pockets = [(p["x"], p["y"], p["radius"]) if isinstance(p, dict) else p for p in pockets]
+    return TableLayout(pockets, name=str(source))
+
+# Layout used when none is given
+DEFAULT_LAYOUT = load_layout()
@@ -0,0 +1,219 @@
+# telemetry.py
+
+import numpy as np
+
+# Per-ball quantities recorded every sample, same as Visualizer.draw_ball_data shows
+QUANTITIES = ("speed", "momentum", "kinetic_energy", "direction")
+
+def ball_quantities(vel: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    """
+    vel:  (N, 2) velocities
+    mass: (N,) masses
+
+    Returns an (N, 4) array of speed, momentum, kinetic energy and direction (degrees, 0 when at rest).
+    """
+    speed = np.hypot(vel[:, 0], vel[:, 1])
+    direction = (np.degrees(np.arctan2(vel[:, 1], vel[:, 0])) + 360) % 360
+    direction[speed <= 0.01] = 0.0
+    return np.stack([speed, speed * mass, 0.5 * mass * speed ** 2, direction], axis=1)
+
+# What the buckets store: direction is kept as a unit vector (zero at rest), so averaging it gives a circular
+# mean; averaging degrees directly would put the mean of 1° and 359° at 180°
+_STORED = ("speed", "momentum", "kinetic_energy", "direction_x", "direction_y")
+
+def _to_stored(values: np.ndarray) -> np.ndarray:
+    """(..., 4) quantities -> (..., 5) stored values."""
+    angle = np.radians(values[..., 3])
+    moving = values[..., 0] > 0.01
+    return np.concatenate([values[..., :3], (np.cos(angle) * moving)[..., None], (np.sin(angle) * moving)[..., None]], axis=-1)
+
+def _from_stored(mn: np.ndarray, mx: np.ndarray, mean: np.ndarray) -> tuple:
+    """
+    Stored min/max/mean -> (..., 4) quantities. The mean direction is the circular mean, in degrees (0 when
+    the ball was at rest throughout). Angles have no min or max, so those are NaN for direction.
+    """
+    x, y = mean[..., 3], mean[..., 4]
+    direction = (np.degrees(np.arctan2(y, x)) + 360) % 360
+    direction[np.hypot(x, y) <= 1e-12] = 0.0
+    nan = np.full(direction.shape + (1,), np.nan)
+    return (np.concatenate([mn[..., :3], nan], axis=-1),
+            np.concatenate([mx[..., :3], nan], axis=-1),
+            np.concatenate([mean[..., :3], direction[..., None]], axis=-1))
+
+class _Buckets:
+    """Fixed-capacity, time-ordered run of buckets, each holding min/max/mean of `count` samples."""
+    def __init__(self, capacity: int, num_balls: int):
+        shape = (capacity, num_balls, len(_STORED))
+        self.t_start = np.zeros(capacity)
+        self.t_end = np.zeros(capacity)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.min = np.zeros(shape)
+        self.max = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.t_start)
+
+    def fields(self, rows=slice(None)) -> tuple:
+        return self.t_start[rows], self.t_end[rows], self.count[rows], self.min[rows], self.max[rows], self.mean[rows]
+
+    def extend(self, t_start, t_end, count, mn, mx, mean) -> None:
+        n = len(t_start)
+        rows = slice(self.size, self.size + n)
+        self.t_start[rows], self.t_end[rows], self.count[rows] = t_start, t_end, count
+        self.min[rows], self.max[rows], self.mean[rows] = mn, mx, mean
+        self.size += n
+
+    def pop_oldest(self, n: int) -> tuple:
+        """Removes and returns the n oldest buckets."""
+        taken = tuple(a.copy() for a in self.fields(slice(0, n)))
+        for a in (self.t_start, self.t_end, self.count, self.min, self.max, self.mean):
+            a[:self.size - n] = a[n:self.size]
+        self.size -= n
+        return taken
+
+def merge_buckets(t_start, t_end, count, mn, mx, mean, group: int) -> tuple:
+    """Combines every `group` consecutive buckets into one. Trailing buckets that don't fill a group are dropped."""
+    n = len(t_start) // group
+    if n == 0:
+        return t_start[:0], t_end[:0], count[:0], mn[:0], mx[:0], mean[:0]
+    shape = (n, group) + mn.shape[1:]
+    count_g = count[:n * group].reshape(n, group)
+    total = count_g.sum(axis=1)
+    weighted = (mean[:n * group].reshape(shape) * count_g[:, :, None, None]).sum(axis=1)
+    return (
+        t_start[:n * group:group],
+        t_end[group - 1:n * group:group],
+        total,
+        mn[:n * group].reshape(shape).min(axis=1),
+        mx[:n * group].reshape(shape).max(axis=1),
+        weighted / np.maximum(total, 1)[:, None, None],
+    )
+
+class Telemetry:
+    """
+    Bounded-memory history of every ball's speed, momentum, kinetic energy and direction.
+
+    Samples go into tier 0 at full resolution. When a tier fills up, its older half is merged
+    `factor` buckets at a time into the next, coarser tier. The last tier doubles the span of its
+    buckets whenever it fills, so the whole session stays covered by a fixed amount of memory.
+
+    num_balls: balls per sample
+    capacity:  buckets per tier
+    factor:    how many buckets of one tier make a bucket of the next
+    tiers:     number of tiers
+    """
+    def __init__(self, num_balls: int, capacity: int = 1024, factor: int = 8, tiers: int = 4):
+        if capacity % (2 * factor):
+            raise ValueError(f"capacity ({capacity}) must be a multiple of 2 * factor ({2 * factor}).")
+        self.num_balls = num_balls
+        self.factor = factor
+        self.tiers = [_Buckets(capacity, num_balls) for _ in range(tiers)]
+
+        # Buckets of the previous tier folded into each bucket of the last tier, and the one being filled
+        self.last_group = 1
+        self._partial = _Buckets(1, num_balls)
+        self._partial_n = 0
+
+    def record(self, t: float, table) -> None:
+        """
+        t:     current time in seconds
+        table: BallSet to sample
+        """
+        self.record_values(t, ball_quantities(table.vel, table.mass))
+
+    def record_values(self, t: float, values: np.ndarray) -> None:
+        """Records one sample of precomputed (num_balls, 4) quantities."""
+        values = _to_stored(values)[None]
+        self._push(0, ([t], [t], [1], values, values, values))
+
+    def _push(self, level: int, buckets: tuple) -> None:
+        tier = self.tiers[level]
+        if level == len(self.tiers) - 1 and level > 0:
+            for row in range(len(buckets[0])):
+                self._fold(tuple(f[row:row + 1] for f in buckets))
+            return
+        if tier.size + len(buckets[0]) > tier.capacity:
+            # Move the older half down a tier, `factor` buckets at a time
+            merged = merge_buckets(*tier.pop_oldest(tier.capacity // 2), group=self.factor)
+            self._push(level + 1, merged)
+        tier.extend(*buckets)
+
+    def _fold(self, bucket: tuple) -> None:
+        """Adds one bucket to the last tier's partial bucket, closing it after last_group buckets."""
+        partial = self._partial
+        if self._partial_n == 0:
+            partial.size = 0
+            partial.extend(*bucket)
+        else:
+            merged = merge_buckets(*(np.concatenate([a, b]) for a, b in zip(partial.fields(slice(0, 1)), bucket)), group=2)
+            partial.size = 0
+            partial.extend(*merged)
+        self._partial_n += 1
+        if self._partial_n < self.last_group:
+            return
+
+        last = self.tiers[-1]
+        if last.size == last.capacity:
+            # Full: merge neighbouring pairs and double the span of every later bucket
+            merged = merge_buckets(*last.pop_oldest(last.size), group=2)
+            last.extend(*merged)
+            self.last_group *= 2
+            if self._partial_n < self.last_group:
+                return
+        last.extend(*partial.fields(slice(0, 1)))
+        self._partial_n = 0
+
+    def __len__(self) -> int:
+        """Number of samples recorded, including those folded into coarser buckets."""
+        partial = self._partial.count[0] if self._partial_n else 0
+        return int(sum(tier.count[:tier.size].sum() for tier in self.tiers) + partial)
+
+    def history(self, t_from: float = None, t_to: float = None, max_points: int = None) -> dict:
+        """
+        Returns the recorded buckets between t_from and t_to, oldest first, at the finest resolution still
+        kept for each part of the session. With max_points, neighbouring buckets are merged further so at
+        most that many are returned, e.g. to plot the whole session zoomed out.
+
+        The result maps "t_start", "t_end", "count" to (M,) arrays and "min", "max", "mean" to
+        (M, num_balls, 4) arrays, with the last axis ordered as QUANTITIES. The mean direction is a circular
+        mean; direction has no min or max, so those are NaN.
+        """
+        # Coarse tiers hold the oldest data, so coarsest-first is chronological
+        tiers = list(reversed(self.tiers))
+        parts = [tiers[0].fields(slice(0, tiers[0].size))]
+        if self._partial_n:
+            parts.append(self._partial.fields(slice(0, 1)))
+        parts += [tier.fields(slice(0, tier.size)) for tier in tiers[1:]]
+        fields = [np.concatenate(column) for column in zip(*parts)]
+
+        t_start, t_end = fields[0], fields[1]
+        keep = np.ones(len(t_start), dtype=bool)
+        if t_from is not None:
+            keep &= t_end >= t_from
+        if t_to is not None:
+            keep &= t_start <= t_to
+        fields = [f[keep] for f in fields]
+
+        if max_points is not None and len(fields[0]) > max_points:
+            group = int(np.ceil(len(fields[0]) / max_points))
+            # Groups are aligned to the newest bucket; any remainder at the oldest end becomes one smaller group
+            skip = len(fields[0]) % group
+            merged = merge_buckets(*(f[skip:] for f in fields), group=group)
+            if skip:
+                head = merge_buckets(*(f[:skip] for f in fields), group=skip)
+                merged = [np.concatenate([a, b]) for a, b in zip(head, merged)]
+            fields = merged
+
+        fields = [*fields[:3], *_from_stored(*fields[3:])]
+        return dict(zip(("t_start", "t_end", "count", "min", "max", "mean"), fields))
+
+    def series(self, quantity: str, ball: int, **kwargs) -> dict:
+        """history() for a single quantity of a single ball, as (M,) arrays."""
+        q = QUANTITIES.index(quantity)
+        h = self.history(**kwargs)
+        for key in ("min", "max", "mean"):
+            h[key] = h[key][:, ball, q]
+        return h
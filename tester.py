@@ -2,41 +2,56 @@ import pygame
 import numpy as np
 import sys
 from constants import *
-from ball import Ball
-from physics import resolve_inelastic_collision, is_in_pocket
-from ui import draw_cue, draw_restart_button, draw_hit_spot_selector
+from simulation import Simulation
+from contacts import contact_ke_loss
+from ui import draw_ball
 from utils import Visualizer
-from graph import Graph
+from audio import CollisionMixer
+from recorder import Recorder
 
 class PoolTester:
-    def __init__(self, direction, strength, material=('elastic','elastic'),visualize=False):
-        pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT + INFO_HEIGHT))
-        pygame.display.set_caption("Pool Simulation Tester")
-        self.clock = pygame.time.Clock()
-        self.visualize = visualize
-        self.col_sound = pygame.mixer.Sound("assets/audio/col-1.wav")
-
-        # Graph
-        self.graph = Graph(2)
+    def __init__(self, direction, strength, material=('elastic','elastic'),visualize=False, headless=False, record=None):
+        """
+        headless: run without a window, sound or graph, as fast as the CPU allows.
+                  Time advances by 1/FPS per step instead of following the wall clock.
+        record:   optional file to record the run to (see recorder.py)
+        """
+        self.headless = headless
+        self.visualize = visualize and not headless
+        self.col_sound = None
+        if not headless:
+            # matplotlib is only loaded when a window is wanted
+            from graph import Graph
+
+            pygame.init()
+            pygame.mixer.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT + INFO_HEIGHT))
+            pygame.display.set_caption("Pool Simulation Tester")
+            self.clock = pygame.time.Clock()
+            self.col_sound = CollisionMixer(pygame.mixer.Sound("assets/audio/col-1.wav"))
+            self.font = pygame.font.SysFont("Arial", 16)
+
+            # Graph
+            self.graph = Graph(2)
 
         # Setup balls same as main (or customize)
         INITIAL_SETUP = [
             (WIDTH/2, HEIGHT/2, WHITE, material[0]),  # Cue ball
             (650, HEIGHT/2, RED, material[1]),      
         ]
-        self.balls = [Ball(*pos) for pos in INITIAL_SETUP]
+        self.sim = Simulation(INITIAL_SETUP, self.col_sound)
+        self.table = self.sim.table
+        self.balls = self.sim.balls
         self.cue_ball = self.balls[0]
+        if record:
+            self.sim.recorder = Recorder(record, self.table)
 
         # Apply initial impulse to cue ball
         dir_norm = direction / np.linalg.norm(direction)
         impulse_magnitude = strength
         impulse = dir_norm * impulse_magnitude
-        self.cue_ball.vel += impulse / self.cue_ball.mass
+        self.sim.apply_impulse(impulse)
 
-        # For visualization and debugging
-        self.font = pygame.font.SysFont("Arial", 16)
         self.elapsed_time = 0.0
         self.running = True
 
@@ -46,94 +61,95 @@ class PoolTester:
         flag = False
 
         while self.running:
-            dt = self.clock.tick(FPS) / 1000
+            if self.headless:
+                dt = 1 / FPS
+            else:
+                dt = self.clock.tick(FPS) / 1000
+                self.handle_events()
+                self.screen.fill(GREEN)
             self.elapsed_time += dt
             last_graph += dt
-            self.handle_events()
-
-            self.screen.fill(GREEN)
 
             if not flag and self.balls[0].speed > 0:
                 print(self.balls[0].speed)
                 flag = True
 
-            # Update balls and collisions
-            for i, ball in enumerate(self.balls):
-                ball.move(self.col_sound)  # Pass None if you don't want sounds here
-                for other_ball in self.balls[i+1:]:
-                    delta_pos = ball.pos - other_ball.pos
-                    dist = np.linalg.norm(delta_pos)
-                    if dist <= 2 * BALL_RADIUS:
-                        # Run diagnostics + collision resolution
-                        self.test_collision_diagnostics(ball, other_ball, resolve_inelastic_collision)
-                if is_in_pocket(ball):
-                    ball.pocketed = True
-
-            # Draw balls
-            for ball in self.balls:
-                ball.draw(self.screen)
-
-            # Velocity vectors and data
-            if self.visualize:
-                for ball in self.balls:
-                    Visualizer.draw_ball_data(self.screen, ball, self.font, WHITE)
-                    Visualizer.draw_velocity_vector(self.screen, ball, YELLOW, 15, 4)
-
-            # Update graph
-            if last_graph >= graph_interval:
-                self.graph.update(self.elapsed_time, self.balls)
-                last_graph -= graph_interval
-
-            # Simple exit condition: stop after 10 seconds or all balls stopped
-            all_stopped = all(ball.speed < 0.01 for ball in self.balls if not ball.pocketed)
-            if self.elapsed_time > 15 and all_stopped:
+            # Update balls, collisions and pockets, then report this step's contacts
+            self.sim.step()
+            self.test_collision_diagnostics()
+
+            if not self.headless:
+                self.col_sound.flush()
+                self.draw(last_graph >= graph_interval)
+                if last_graph >= graph_interval:
+                    last_graph -= graph_interval
+
+            # Stop as soon as every ball has come to rest
+            if self.sim.settled:
                 print(f"Test ended at time={self.elapsed_time:.2f}s")
                 self.running = False
 
-            pygame.display.flip()
+        if self.sim.recorder is not None:
+            self.sim.recorder.close()
+        if not self.headless:
+            pygame.quit()
+            sys.exit()
 
-        pygame.quit()
-        sys.exit()
+    def draw(self, update_graph):
+        # Draw balls
+        for ball in self.balls:
+            draw_ball(self.screen, ball)
+
+        # Velocity vectors and data
+        if self.visualize:
+            for ball in self.balls:
+                Visualizer.draw_ball_data(self.screen, ball, self.font, WHITE)
+                Visualizer.draw_velocity_vector(self.screen, ball, YELLOW, 15, 4)
+
+        # Update graph
+        if update_graph:
+            self.graph.update(self.elapsed_time, self.balls)
+
+        pygame.display.flip()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
 
-    def calculate_ke_loss(self, ball1, ball2, before_vel1, before_vel2):
+    def calculate_ke_loss(self, contacts):
         """
-        Calculates kinetic energy lost in a collision.
+        Calculates kinetic energy lost in each ball-ball contact of the latest step.
+        'after' is the pair's kinetic energy at the end of the step.
         """
-        ke_before = 0.5 * ball1.mass * np.dot(before_vel1, before_vel1) + \
-                    0.5 * ball2.mass * np.dot(before_vel2, before_vel2)
-        ke_after = 0.5 * ball1.mass * np.dot(ball1.vel, ball1.vel) + \
-                0.5 * ball2.mass * np.dot(ball2.vel, ball2.vel)
+        mass = self.table.mass
+        vel_sq = np.einsum("ij,ij->i", self.table.vel, self.table.vel)
+        ke_after = 0.5 * mass[contacts["i"]] * vel_sq[contacts["i"]] + \
+                   0.5 * mass[contacts["j"]] * vel_sq[contacts["j"]]
 
-        ke_lost = ke_before - ke_after
+        ke_lost = contact_ke_loss(contacts, mass)
 
         return {
-            'before': ke_before,
+            'before': ke_after + ke_lost,
             'after': ke_after,
             'lost': ke_lost
         }
-    
-    def test_collision_diagnostics(self, ball1, ball2, resolve_collision_fn):
+
+    def test_collision_diagnostics(self):
         """
-        Tests momentum change and kinetic energy loss for a ball collision.
+        Tests kinetic energy loss for the ball collisions of the latest step, read from the contact buffer.
         """
-        # Pre-collision velocities
-        v1_before = ball1.vel.copy()
-        v2_before = ball2.vel.copy()
-
-        # Resolve collision
-        resolve_collision_fn(ball1, ball2, None)
+        contacts = self.table.contacts.pairs()
+        if not len(contacts):
+            return None
 
         # Kinetic energy diagnostics
-        ke_result = self.calculate_ke_loss(ball1, ball2, v1_before, v2_before)
-        print(f"KE before: {ke_result['before']:.3f}")
-        print(f"KE after:  {ke_result['after']:.3f}")
-        print(f"KE lost:   {ke_result['lost']:.3f}")
-        print("=============================")
+        ke_result = self.calculate_ke_loss(contacts)
+        for before, after, lost in zip(ke_result['before'], ke_result['after'], ke_result['lost']):
+            print(f"KE before: {before:.3f}")
+            print(f"KE after:  {after:.3f}")
+            print(f"KE lost:   {lost:.3f}")
+            print("=============================")
 
         return ke_result
 
@@ -142,5 +158,7 @@ if __name__ == "__main__":
     direction = np.array([1.0, 0.0])
     strength = 1
     material = ('ivory','ivory')
-    tester = PoolTester(direction, strength, material, visualize=True)
+    headless = "--headless" in sys.argv
+    record = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+    tester = PoolTester(direction, strength, material, visualize=True, headless=headless, record=record)
     tester.run()
@@ -1,8 +1,16 @@
 import pygame
 import numpy as np
-from constants import (WIDTH, HEIGHT, BLACK, GRAY, MAXIMUM_FORCE, WHITE,
+from utils import text_cache
+from constants import (WIDTH, HEIGHT, BALL_RADIUS, BLACK, GRAY, MAXIMUM_FORCE, WHITE,
                      HIT_SPOT_SELECTOR_CENTER_X, HIT_SPOT_SELECTOR_CENTER_Y, HIT_SPOT_BG_RADIUS, HIT_SPOT_BUTTON_RADIUS, HIT_SPOT_BUTTON_OFFSET, HIT_SPOT_EFFECTS)
 
+def draw_ball(screen, ball, pos=None):
+    """pos overrides ball.pos, e.g. with an interpolated render position. Returns the drawn rect, or None."""
+    if not ball.pocketed:
+        if pos is None:
+            pos = ball.pos
+        return pygame.draw.circle(screen, ball.color, pos.astype(int), BALL_RADIUS)
+
 def draw_cue(screen, cue_ball, mouse_pos, dragging): 
     if not dragging or cue_ball.is_moving(): 
         return 
@@ -16,13 +24,39 @@ def draw_cue(screen, cue_ball, mouse_pos, dragging):
     unit = direction / np.linalg.norm(direction) 
     # Calculate end point: p_end = p_ball + length * unit
     end_pos = cue_ball.pos + unit * length 
-    pygame.draw.line(screen, BLACK, cue_ball.pos.astype(int), end_pos.astype(int), 4) 
+    return pygame.draw.line(screen, BLACK, cue_ball.pos.astype(int), end_pos.astype(int), 4)
+
+def draw_aim(screen, prediction, balls):
+    """Draws an AimPrediction: the cue ball's path, a ghost ball where it makes contact and the object ball's path. Returns the drawn rect, or None."""
+    if len(prediction.cue_path) < 2:
+        return
+    rect = pygame.draw.lines(screen, WHITE, False, prediction.cue_path.astype(int), 1)
+    if prediction.target is not None:
+        rect = rect.union(pygame.draw.circle(screen, WHITE, prediction.contact.astype(int), BALL_RADIUS, 1))
+        if len(prediction.target_path) > 1:
+            color = balls[prediction.target].color
+            rect = rect.union(pygame.draw.lines(screen, color, False, prediction.target_path.astype(int), 1))
+    return rect
+
+def draw_profiler(screen, font, stats, pos=(10, 10)):
+    """
+    Draws the profiler HUD: one line per phase with its rolling p50 / p95 / max frame time in ms.
+    stats is FrameProfiler.percentiles(). Returns the drawn rect, or None.
+    """
+    x, y = pos
+    rect = None
+    for name, (p50, p95, worst) in stats.items():
+        line = f"{name}: {p50:.2f} / {p95:.2f} / {worst:.2f} ms"
+        drawn = text_cache(font).blit(screen, line, (x, y), WHITE)
+        rect = drawn if rect is None else rect.union(drawn)
+        y += font.get_linesize()
+    return rect
 
 def draw_restart_button(screen, font): 
     rect = pygame.Rect(WIDTH // 2 - 60, HEIGHT // 2 - 25, 120, 50) 
     pygame.draw.rect(screen, GRAY, rect) 
     pygame.draw.rect(screen, BLACK, rect, 2) 
-    text = font.render("RESTART", True, BLACK) 
+    text = text_cache(font).render("RESTART", BLACK)
     screen.blit(text, (rect.x + 20, rect.y + 12)) 
     return rect
 
@@ -1,8 +1,81 @@
 import pygame
 import numpy as np
 import math
+from collections import OrderedDict
 from ball import Ball
 
+class TextCache:
+    """
+    Cached text rendering for one font. font.render is one of the most expensive pygame calls,
+    so it is only called for text that hasn't been seen before.
+
+    blit() draws every string from per-character glyph surfaces, which are rendered once per character
+    and color; the glyph layout of up to max_strings recent strings is kept in an LRU. Every string
+    always takes this same path, so a live readout that changes every frame (and is seen once) and a
+    static label (seen every frame) are laid out the same way and never jump by a kerning pixel.
+    render() returns a whole-string surface, also from an LRU, for callers that need one.
+    """
+    def __init__(self, font: pygame.font.Font, max_strings: int = 512):
+        self.font = font
+        self.max_strings = max_strings
+        self._strings = OrderedDict()
+        self._layouts = OrderedDict()
+        self._glyphs = {}
+
+    def render(self, text: str, color) -> pygame.Surface:
+        """Returns the rendered surface for text, rendering it only on a cache miss."""
+        key = (text, tuple(color))
+        surface = self._strings.get(key)
+        if surface is not None:
+            self._strings.move_to_end(key)
+            return surface
+        surface = self.font.render(text, True, color)
+        self._strings[key] = surface
+        if len(self._strings) > self.max_strings:
+            self._strings.popitem(last=False)
+        return surface
+
+    def glyph(self, char: str, color) -> pygame.Surface:
+        key = (char, tuple(color))
+        surface = self._glyphs.get(key)
+        if surface is None:
+            surface = self._glyphs[key] = self.font.render(char, True, color)
+        return surface
+
+    def layout(self, text: str, color) -> tuple:
+        """(glyph surfaces, x offsets, total width) of text, laid out by glyph advances."""
+        key = (text, tuple(color))
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            return layout
+        surfaces, offsets, x = [], [], 0
+        for char in text:
+            surface = self.glyph(char, color)
+            surfaces.append(surface)
+            offsets.append(x)
+            x += surface.get_width()
+        layout = self._layouts[key] = (surfaces, offsets, x)
+        if len(self._layouts) > self.max_strings:
+            self._layouts.popitem(last=False)
+        return layout
+
+    def blit(self, screen: pygame.Surface, text: str, pos, color) -> pygame.Rect:
+        """Draws text at pos (top-left) and returns the drawn rect."""
+        surfaces, offsets, width = self.layout(text, color)
+        x, y = pos
+        screen.blits([(surface, (x + dx, y)) for surface, dx in zip(surfaces, offsets)], doreturn=False)
+        return pygame.Rect(x, y, width, self.font.get_linesize()).clip(screen.get_clip())
+
+_text_caches = {}
+
+def text_cache(font: pygame.font.Font) -> TextCache:
+    """Shared TextCache for a font, so every overlay drawing with the same font hits the same cache."""
+    cache = _text_caches.get(font)
+    if cache is None:
+        cache = _text_caches[font] = TextCache(font)
+    return cache
+
 # data visualization
 class Visualizer():
     
@@ -12,8 +85,8 @@ class Visualizer():
         ball:Ball, 
         font:pygame.font.Font, 
         font_color:pygame.color.Color
-    ) -> None:
-        
+    ) -> pygame.Rect:
+        """Draws speed, momentum, kinetic energy and direction next to the ball. Returns the drawn rect, or None."""
         if ball.pocketed:
             return
         
@@ -38,11 +111,10 @@ class Visualizer():
             direction_str
         ]
 
-        for i, text in enumerate(text_infos):
-            label = font.render(text, True, font_color)
-            screen.blit(label, (x + 15, y + i * 15 - 20))
+        text = text_cache(font)
+        rects = [text.blit(screen, info, (x + 15, y + i * 15 - 20), font_color) for i, info in enumerate(text_infos)]
 
-        return 
+        return rects[0].unionall(rects[1:])
     
     @staticmethod
     def draw_velocity_vector(
@@ -51,7 +123,8 @@ class Visualizer():
         color: pygame.Color = (0,255,0),
         scale: float = 20,
         arrow_size: int = 5,
-    ) -> None:
+    ) -> pygame.Rect:
+        """Draws the velocity as an arrow from the ball. Returns the drawn rect, or None."""
         if ball.pocketed:
             return
         
@@ -66,7 +139,7 @@ class Visualizer():
         end_y = y + vy * scale
 
         # Velocity line
-        pygame.draw.line(
+        line_rect = pygame.draw.line(
             screen,
             color,
             (int(x), int(y)),
@@ -85,7 +158,7 @@ class Visualizer():
         )
 
         # Arrowhead
-        pygame.draw.polygon(
+        head_rect = pygame.draw.polygon(
             screen,
             color,
             [
@@ -95,4 +168,4 @@ class Visualizer():
             ]
         )
 
-        ...
\ No newline at end of file
+        return line_rect.union(head_rect)
\ No newline at end of file